@@ -1,5 +1,16 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, useNavigate } from 'react-router-dom';
+import axios from 'axios';
+
+// Stored upload behind a document field, with its generated previews
+interface DocumentFile {
+  sha256: string;
+  content_type: string;
+  size: number;
+  preview_status: 'pending' | 'ready' | 'unsupported' | 'failed';
+  thumbnail_path?: string;
+  preview_path?: string;
+}
 
 // TypeScript interface based on the schema
 interface AccountApplication {
@@ -56,6 +67,9 @@ interface AccountApplication {
   driver_license_file_path?: string;
   sales_tax_permit_file_path?: string;
   lease_agreement_file_path?: string;
+  driver_license_document?: DocumentFile;
+  sales_tax_permit_document?: DocumentFile;
+  lease_agreement_document?: DocumentFile;
   status: 'pending' | 'approved' | 'rejected' | 'under_review';
   created_at: string;
   updated_at: string;
@@ -75,6 +89,58 @@ interface AccountApplicationDetailsProps {
   onBack?: () => void;
 }
 
+// Documents are served to admins only, so they are fetched with the auth header
+// and shown through object URLs rather than linked directly
+const fetchDocument = async (path: string): Promise<string> => {
+  const response = await axios.get(`/admin/documents/${path}`, { responseType: 'blob' });
+  return URL.createObjectURL(response.data);
+};
+
+const openDocument = async (path?: string) => {
+  if (!path) return;
+  try {
+    window.open(await fetchDocument(path.replace(/^\//, '')), '_blank');
+  } catch (error) {
+    console.error('Failed to open document:', error);
+  }
+};
+
+// Small WebP thumbnail once the backend has rendered it, else a generic file icon
+const DocumentThumbnail: React.FC<{ file?: DocumentFile }> = ({ file }) => {
+  const [thumbnailUrl, setThumbnailUrl] = useState<string | null>(null);
+
+  useEffect(() => {
+    if (file?.preview_status !== 'ready' || !file.thumbnail_path) return;
+    let objectUrl: string | null = null;
+    let cancelled = false;
+    fetchDocument(file.thumbnail_path)
+      .then((url) => {
+        objectUrl = url;
+        if (!cancelled) setThumbnailUrl(url);
+      })
+      .catch(() => setThumbnailUrl(null));
+    return () => {
+      cancelled = true;
+      if (objectUrl) URL.revokeObjectURL(objectUrl);
+    };
+  }, [file?.preview_status, file?.thumbnail_path]);
+
+  if (thumbnailUrl) {
+    return (
+      <img
+        src={thumbnailUrl}
+        alt=""
+        className="w-10 h-10 object-cover rounded border border-gray-200 mr-2"
+      />
+    );
+  }
+  return (
+    <svg className="w-5 h-5 text-gray-400 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
+      <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
+    </svg>
+  );
+};
+
 const AccountApplicationDetails: React.FC<AccountApplicationDetailsProps> = ({
   applicationId,
   onStatusUpdate,
@@ -519,34 +585,43 @@ const AccountApplicationDetails: React.FC<AccountApplicationDetailsProps> = ({
               {application.driver_license_file_path && (
                 <div className="flex items-center justify-between p-2 bg-gray-50 rounded">
                   <div className="flex items-center">
-                    <svg className="w-5 h-5 text-gray-400 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                      <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
-                    </svg>
+                    <DocumentThumbnail file={application.driver_license_document} />
                     <span className="text-sm text-gray-700">Driver License</span>
                   </div>
-                  <button className="text-blue-600 hover:text-blue-800 text-sm">View</button>
+                  <button
+                    className="text-blue-600 hover:text-blue-800 text-sm"
+                    onClick={() => openDocument(application.driver_license_file_path)}
+                  >
+                    View
+                  </button>
                 </div>
               )}
               {application.sales_tax_permit_file_path && (
                 <div className="flex items-center justify-between p-2 bg-gray-50 rounded">
                   <div className="flex items-center">
-                    <svg className="w-5 h-5 text-gray-400 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                      <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
-                    </svg>
+                    <DocumentThumbnail file={application.sales_tax_permit_document} />
                     <span className="text-sm text-gray-700">Sales Tax Permit</span>
                   </div>
-                  <button className="text-blue-600 hover:text-blue-800 text-sm">View</button>
+                  <button
+                    className="text-blue-600 hover:text-blue-800 text-sm"
+                    onClick={() => openDocument(application.sales_tax_permit_file_path)}
+                  >
+                    View
+                  </button>
                 </div>
               )}
               {application.lease_agreement_file_path && (
                 <div className="flex items-center justify-between p-2 bg-gray-50 rounded">
                   <div className="flex items-center">
-                    <svg className="w-5 h-5 text-gray-400 mr-2" fill="none" stroke="currentColor" viewBox="0 0 24 24">
-                      <path strokeLinecap="round" strokeLinejoin="round" strokeWidth={2} d="M9 12h6m-6 4h6m2 5H7a2 2 0 01-2-2V5a2 2 0 012-2h5.586a1 1 0 01.707.293l5.414 5.414a1 1 0 01.293.707V19a2 2 0 01-2 2z" />
-                    </svg>
+                    <DocumentThumbnail file={application.lease_agreement_document} />
                     <span className="text-sm text-gray-700">Lease Agreement</span>
                   </div>
-                  <button className="text-blue-600 hover:text-blue-800 text-sm">View</button>
+                  <button
+                    className="text-blue-600 hover:text-blue-800 text-sm"
+                    onClick={() => openDocument(application.lease_agreement_file_path)}
+                  >
+                    View
+                  </button>
                 </div>
               )}
             </div>
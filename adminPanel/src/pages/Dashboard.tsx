@@ -24,13 +24,12 @@ export default function Dashboard() {
 
   const fetchStats = async () => {
     try {
-      // In a real app, you'd have dedicated stats endpoints
-      // For now, we'll simulate the data
+      const response = await axios.get('/admin/stats')
       setStats({
-        totalProducts: 20,
-        totalUsers: 150,
-        totalOrders: 45,
-        totalRevenue: 125000
+        totalProducts: response.data.total_products,
+        totalUsers: response.data.total_users,
+        totalOrders: response.data.total_orders,
+        totalRevenue: response.data.total_revenue
       })
     } catch (error) {
       console.error('Error fetching stats:', error)
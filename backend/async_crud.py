@@ -0,0 +1,79 @@
+"""Async variants of the crud module for request handlers.
+
+Each function runs the matching sync crud function on the AsyncSession's
+underlying Session via `run_sync`, so the query logic lives in one place while
+database I/O goes through the async driver and no longer blocks the event loop.
+"""
+import functools
+from sqlalchemy.ext.asyncio import AsyncSession
+import crud
+
+def _async_variant(crud_function):
+    @functools.wraps(crud_function)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(crud_function, *args, **kwargs)
+    return wrapper
+
+# User CRUD operations
+get_user = _async_variant(crud.get_user)
+get_user_by_email = _async_variant(crud.get_user_by_email)
+get_users = _async_variant(crud.get_users)
+create_user = _async_variant(crud.create_user)
+update_user = _async_variant(crud.update_user)
+
+# Product CRUD operations
+rebuild_product_attributes = _async_variant(crud.rebuild_product_attributes)
+load_catalog = _async_variant(crud.load_catalog)
+get_catalog_fingerprint = _async_variant(crud.get_catalog_fingerprint)
+get_product = _async_variant(crud.get_product)
+get_products = _async_variant(crud.get_products)
+search_products = _async_variant(crud.search_products)
+get_product_facets = _async_variant(crud.get_product_facets)
+create_product = _async_variant(crud.create_product)
+bulk_upsert_products = _async_variant(crud.bulk_upsert_products)
+update_product = _async_variant(crud.update_product)
+add_product_image = _async_variant(crud.add_product_image)
+delete_product = _async_variant(crud.delete_product)
+
+# Inventory operations
+get_product_variant_by_sku = _async_variant(crud.get_product_variant_by_sku)
+create_product_variant = _async_variant(crud.create_product_variant)
+update_product_variant = _async_variant(crud.update_product_variant)
+delete_product_variant = _async_variant(crud.delete_product_variant)
+
+# Order CRUD operations
+get_order = _async_variant(crud.get_order)
+get_user_orders = _async_variant(crud.get_user_orders)
+create_order = _async_variant(crud.create_order)
+confirm_order = _async_variant(crud.confirm_order)
+release_expired_reservations = _async_variant(crud.release_expired_reservations)
+
+# Wishlist CRUD operations
+get_wishlist_items = _async_variant(crud.get_wishlist_items)
+get_wishlist_product_ids = _async_variant(crud.get_wishlist_product_ids)
+add_to_wishlist = _async_variant(crud.add_to_wishlist)
+remove_from_wishlist = _async_variant(crud.remove_from_wishlist)
+add_to_wishlist_batch = _async_variant(crud.add_to_wishlist_batch)
+remove_from_wishlist_batch = _async_variant(crud.remove_from_wishlist_batch)
+
+# Account Application CRUD operations
+generate_account_number = _async_variant(crud.generate_account_number)
+get_stored_blob = _async_variant(crud.get_stored_blob)
+get_blobs_pending_preview = _async_variant(crud.get_blobs_pending_preview)
+set_blob_previews = _async_variant(crud.set_blob_previews)
+create_account_application = _async_variant(crud.create_account_application)
+get_account_application = _async_variant(crud.get_account_application)
+get_account_applications = _async_variant(crud.get_account_applications)
+update_account_application_status = _async_variant(crud.update_account_application_status)
+get_account_application_by_email = _async_variant(crud.get_account_application_by_email)
+
+# Idempotency key operations
+claim_idempotency_key = _async_variant(crud.claim_idempotency_key)
+renew_idempotency_key = _async_variant(crud.renew_idempotency_key)
+complete_idempotency_key = _async_variant(crud.complete_idempotency_key)
+release_idempotency_key = _async_variant(crud.release_idempotency_key)
+purge_expired_idempotency_keys = _async_variant(crud.purge_expired_idempotency_keys)
+
+# Dashboard statistics
+get_stats = _async_variant(crud.get_stats)
+reconcile_stat_counters = _async_variant(crud.reconcile_stat_counters)
@@ -0,0 +1,63 @@
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+# Normalized product attributes derived from the free-form `specifications`
+# JSON. They are stored in `product_attributes` so the storefront's metal and
+# diamond filters can run as indexed lookups instead of per-row JSON scans.
+METAL_TYPE = "metal_type"
+METAL_TONE = "metal_tone"
+DIAMOND_WEIGHT = "diamond_weight"
+
+# Diamond weight filter options offered by the storefront, in carats. A product
+# falls in the bucket of the largest option not above its weight.
+DIAMOND_WEIGHT_BUCKETS = ["0.25", "0.50", "0.75", "1.00", "1.50", "2.00"]
+DIAMOND_WEIGHT_UNDER = "lt-0.25"
+DIAMOND_WEIGHT_OVER = "gt-2.00"
+
+METAL_TONES = {
+    "yellow_gold": r"yellow",
+    "white_gold": r"white",
+    "rose_gold": r"rose",
+    "two_tone": r"two[\s-]*tone",
+    "silver": r"silver",
+}
+
+def _normalize_key(key: str) -> str:
+    return re.sub(r"[^a-z]+", " ", key.lower()).strip()
+
+def _metal_types(metal: str) -> List[str]:
+    types = [f"{karat}k" for karat in re.findall(r"\b(\d{1,2})\s*k(?:t|arat)?\b", metal)]
+    if "sterling" in metal:
+        types.append("sterling_silver")
+    if "platinum" in metal:
+        types.append("platinum")
+    return types
+
+def _metal_tones(metal: str) -> List[str]:
+    return [tone for tone, pattern in METAL_TONES.items() if re.search(pattern, metal)]
+
+def diamond_weight_bucket(weight: float) -> str:
+    if weight < float(DIAMOND_WEIGHT_BUCKETS[0]):
+        return DIAMOND_WEIGHT_UNDER
+    if weight > float(DIAMOND_WEIGHT_BUCKETS[-1]):
+        return DIAMOND_WEIGHT_OVER
+    return [bucket for bucket in DIAMOND_WEIGHT_BUCKETS if float(bucket) <= weight][-1]
+
+def _parse_weight(value: Any) -> Optional[float]:
+    match = re.search(r"\d+(?:\.\d+)?", str(value))
+    return float(match.group()) if match else None
+
+def derive_attributes(specifications: Optional[Dict[str, Any]]) -> List[Tuple[str, str]]:
+    """Return the distinct (name, value) attribute pairs for a product's specifications"""
+    attributes = []
+    for key, value in (specifications or {}).items():
+        key = _normalize_key(key)
+        if key in ("metal", "metal type"):
+            metal = str(value).lower()
+            attributes += [(METAL_TYPE, metal_type) for metal_type in _metal_types(metal)]
+            attributes += [(METAL_TONE, tone) for tone in _metal_tones(metal)]
+        elif "diamond" in key and "weight" in key:
+            weight = _parse_weight(value)
+            if weight is not None:
+                attributes.append((DIAMOND_WEIGHT, diamond_weight_bucket(weight)))
+    return list(dict.fromkeys(attributes))
@@ -1,16 +1,19 @@
 from datetime import datetime, timedelta
+from types import SimpleNamespace
 from typing import Optional
 from jose import JWTError, jwt
-from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
-from database import get_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_async_db
 import models
 import schemas
+import passwords
+from passwords import pwd_context
+from cache import principal_cache
 from config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token")
 
 def verify_password(plain_password, hashed_password):
@@ -40,7 +43,47 @@ def verify_token(token: str, credentials_exception):
         raise credentials_exception
     return token_data
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
+async def _get_user_by_email(db: AsyncSession, email: str):
+    result = await db.execute(select(models.User).where(models.User.email == email))
+    return result.scalars().first()
+
+async def _get_approved_application(db: AsyncSession, email: str):
+    result = await db.execute(
+        select(models.AccountApplication).where(
+            models.AccountApplication.email == email,
+            models.AccountApplication.status == "approved"
+        )
+    )
+    return result.scalars().first()
+
+def _user_principal(user: models.User):
+    # Detached snapshot of the user row, safe to share across requests
+    return SimpleNamespace(
+        id=user.id,
+        email=user.email,
+        name=user.name,
+        phone=user.phone,
+        is_admin=user.is_admin,
+        is_application=False,
+        created_at=user.created_at,
+        updated_at=user.updated_at
+    )
+
+def _application_principal(application: models.AccountApplication):
+    # User-like object for approved applications
+    return SimpleNamespace(
+        id=application.id,
+        email=application.email,
+        name=application.legal_name,
+        phone=application.tel_business,
+        account_number=application.account_number,
+        is_application=True,
+        is_admin=False,  # Approved applications are not admin users
+        created_at=application.created_at,
+        updated_at=application.updated_at
+    )
+
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -48,30 +91,27 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     )
     token_data = verify_token(token, credentials_exception)
     
-    # First check regular users
-    user = db.query(models.User).filter(models.User.email == token_data.email).first()
-    if user is not None:
-        return user
+    principal = principal_cache.get(token_data.email)
+    if principal is not None:
+        return principal
     
-    # If no regular user found, check approved account applications
-    application = db.query(models.AccountApplication).filter(
-        models.AccountApplication.email == token_data.email,
-        models.AccountApplication.status == "approved"
-    ).first()
+    # A status change or user update committed while this reads bumps the
+    # generation, so the outdated principal is not cached
+    generation = principal_cache.generation(token_data.email)
     
-    if application is not None:
-        # Return a user-like object for approved applications
-        return type('User', (), {
-            'id': application.id,
-            'email': application.email,
-            'name': application.legal_name,
-            'phone': application.tel_business,
-            'account_number': application.account_number,
-            'is_application': True,
-            'is_admin': False  # Approved applications are not admin users
-        })()
+    # First check regular users
+    user = await _get_user_by_email(db, token_data.email)
+    if user is not None:
+        principal = _user_principal(user)
+    else:
+        # If no regular user found, check approved account applications
+        application = await _get_approved_application(db, token_data.email)
+        if application is None:
+            raise credentials_exception
+        principal = _application_principal(application)
     
-    raise credentials_exception
+    principal_cache.set(token_data.email, principal, generation=generation)
+    return principal
 
 def get_current_active_user(current_user: models.User = Depends(get_current_user)):
     return current_user
@@ -84,31 +124,20 @@ def get_current_admin_user(current_user: models.User = Depends(get_current_user)
         )
     return current_user
 
-def authenticate_user(db: Session, email: str, password: str):
+async def authenticate_user(db: AsyncSession, email: str, password: str):
     # First check regular users
-    user = db.query(models.User).filter(models.User.email == email).first()
+    user = await _get_user_by_email(db, email)
     if user:
-        if not verify_password(password, user.hashed_password):
+        if not await passwords.verify_password(password, user.hashed_password):
             return False
         return user
     
     # If no regular user found, check approved account applications
-    application = db.query(models.AccountApplication).filter(
-        models.AccountApplication.email == email,
-        models.AccountApplication.status == "approved"
-    ).first()
+    application = await _get_approved_application(db, email)
     
     if application:
-        if not verify_password(password, application.hashed_password):
+        if not await passwords.verify_password(password, application.hashed_password):
             return False
-        # Return a user-like object for approved applications
-        return type('User', (), {
-            'id': application.id,
-            'email': application.email,
-            'name': application.legal_name,
-            'phone': application.tel_business,
-            'account_number': application.account_number,
-            'is_application': True
-        })()
+        return _application_principal(application)
     
     return False
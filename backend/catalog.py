@@ -0,0 +1,178 @@
+import hashlib
+import threading
+import time
+from datetime import timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+import models
+import schemas
+from pagination import Page, paginate_list
+from config import settings
+
+def _utc(stamp):
+    # SQLite stores CURRENT_TIMESTAMP as naive UTC
+    return stamp.replace(tzinfo=timezone.utc) if stamp.tzinfo is None else stamp
+
+# Product hashes are summed modulo this, so the catalog digest can be updated
+# one product at a time
+_DIGEST_MODULUS = 1 << 80
+
+def _fingerprint(snapshot: schemas.Product) -> Tuple[int, Optional[float]]:
+    """(content hash, newest created/updated epoch) of one product snapshot"""
+    digest = int.from_bytes(hashlib.sha1(snapshot.model_dump_json().encode()).digest()[:10], "big")
+    stamps = [_utc(stamp).timestamp() for stamp in (snapshot.created_at, snapshot.updated_at) if stamp is not None]
+    return digest, max(stamps, default=None)
+
+class CatalogCache:
+    """Process-local copy of the product catalog for read-heavy endpoints.
+
+    Holds fully-hydrated `schemas.Product` snapshots (images included) keyed by
+    id. crud's product writes patch it in place; a full reload happens on
+    first use and every CATALOG_CACHE_REFRESH_SECONDS to pick up writes made
+    by other worker processes.
+    """
+
+    def __init__(self, enabled: bool, refresh_seconds: float):
+        self.enabled = enabled
+        self.refresh_seconds = refresh_seconds
+        self._products: Dict[int, schemas.Product] = {}
+        self._fingerprints: Dict[int, Tuple[int, Optional[float]]] = {}
+        self._ordered: Optional[List[schemas.Product]] = None
+        self._version = 0
+        self._loaded_at: Optional[float] = None
+        # Sum of the product hashes, kept up to date by every patch
+        self._digest = 0
+        # None when the newest product was replaced by an older one or removed
+        self._newest: Optional[float] = 0.0
+        self._lock = threading.RLock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def content_tag(self) -> str:
+        return self.validators()[0]
+
+    @property
+    def last_modified(self) -> Optional[float]:
+        return self.validators()[1]
+
+    def validators(self) -> Tuple[str, Optional[float]]:
+        """(content hash, newest created/updated epoch) of the cached catalog.
+
+        Both derive from the data alone, so every worker holding the same
+        catalog hands out the same ETag and Last-Modified.
+        """
+        with self._lock:
+            if self._newest is None:
+                self._newest = max((newest for _, newest in self._fingerprints.values() if newest is not None), default=0.0)
+            return f"{self._digest:020x}", self._newest or None
+
+    def _put(self, snapshot: schemas.Product, fingerprint: Tuple[int, Optional[float]]):
+        self._discard(snapshot.id)
+        self._products[snapshot.id] = snapshot
+        self._fingerprints[snapshot.id] = fingerprint
+        self._digest = (self._digest + fingerprint[0]) % _DIGEST_MODULUS
+        if self._newest is not None and fingerprint[1] is not None:
+            self._newest = max(self._newest, fingerprint[1])
+
+    def _discard(self, product_id: int):
+        self._products.pop(product_id, None)
+        fingerprint = self._fingerprints.pop(product_id, None)
+        if fingerprint is None:
+            return
+        self._digest = (self._digest - fingerprint[0]) % _DIGEST_MODULUS
+        if fingerprint[1] is not None and fingerprint[1] == self._newest:
+            self._newest = None
+
+    def needs_load(self) -> bool:
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.refresh_seconds
+
+    def _bump(self):
+        self._version += 1
+        self._ordered = None
+
+    def load(self, products: Iterable[models.Product], started_at_version: int):
+        """Replace the cache contents, unless a write landed while they were read"""
+        snapshots = {product.id: schemas.Product.model_validate(product) for product in products}
+        with self._lock:
+            if self._version != started_at_version:
+                # A concurrent write patched the cache; the rows read may predate it
+                return
+            self._loaded_at = time.monotonic()
+            if snapshots == self._products:
+                return
+            for product_id in set(self._products) - set(snapshots):
+                self._discard(product_id)
+            for product_id, snapshot in snapshots.items():
+                # Only products that changed since the last load are hashed again
+                if self._products.get(product_id) != snapshot:
+                    self._put(snapshot, _fingerprint(snapshot))
+            self._bump()
+
+    def upsert(self, product: models.Product):
+        snapshot = schemas.Product.model_validate(product)
+        fingerprint = _fingerprint(snapshot)
+        with self._lock:
+            self._put(snapshot, fingerprint)
+            self._bump()
+
+    def upsert_many(self, products: Iterable[models.Product]):
+        snapshots = [schemas.Product.model_validate(product) for product in products]
+        fingerprints = [_fingerprint(snapshot) for snapshot in snapshots]
+        with self._lock:
+            for snapshot, fingerprint in zip(snapshots, fingerprints):
+                self._put(snapshot, fingerprint)
+            self._bump()
+
+    def update_stock(self, products: Iterable, variants: Dict[int, int]):
+        """Patch stock levels in place from (id, in_stock, stock_quantity, updated_at) rows and {variant id: quantity}"""
+        with self._lock:
+            for product_id, in_stock, stock_quantity, updated_at in products:
+                snapshot = self._products.get(product_id)
+                if snapshot is None:
+                    continue
+                changes = {"in_stock": in_stock, "stock_quantity": stock_quantity, "updated_at": updated_at}
+                if any(variant.id in variants for variant in snapshot.variants):
+                    changes["variants"] = [
+                        variant.model_copy(update={"stock_quantity": variants[variant.id]})
+                        if variant.id in variants else variant
+                        for variant in snapshot.variants
+                    ]
+                snapshot = snapshot.model_copy(update=changes)
+                self._put(snapshot, _fingerprint(snapshot))
+            self._bump()
+
+    def remove(self, product_id: int):
+        with self._lock:
+            self._discard(product_id)
+            self._bump()
+
+    def get(self, product_id: int) -> Optional[schemas.Product]:
+        return self._products.get(product_id)
+
+    def _ordered_products(self) -> List[schemas.Product]:
+        with self._lock:
+            if self._ordered is None:
+                self._ordered = sorted(self._products.values(), key=lambda product: product.id)
+            return self._ordered
+
+    def list_products(self, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, **filters) -> Page:
+        """Equality-filter the catalog in id order; None-valued filters are ignored"""
+        filters = {field: value for field, value in filters.items() if value is not None}
+        matches = [
+            product for product in self._ordered_products()
+            if all(getattr(product, field) == value for field, value in filters.items())
+        ]
+        return paginate_list(matches, lambda product: (product.id,), 1, skip, limit, cursor)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "version": self._version,
+            "products": len(self._products),
+            "loaded": self._loaded_at is not None,
+        }
+
+catalog_cache = CatalogCache(settings.CATALOG_CACHE_ENABLED, settings.CATALOG_CACHE_REFRESH_SECONDS)
@@ -0,0 +1,149 @@
+"""NDJSON/CSV encoding of products for the admin bulk import/export endpoints"""
+import csv
+import io
+import json
+from typing import AsyncIterator, Iterable, Iterator, Optional, Tuple
+from pydantic import ValidationError
+import models
+import schemas
+
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# CSV columns; specifications and images hold JSON documents
+CSV_COLUMNS = list(schemas.ProductBase.model_fields) + ["images"]
+CSV_JSON_COLUMNS = {"specifications", "images"}
+
+# Export responses are flushed in chunks of roughly this many characters
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+def format_for_content_type(content_type: Optional[str]) -> Optional[str]:
+    media_type = (content_type or "").split(";")[0].strip().lower()
+    for name, format_media_type in FORMATS.items():
+        if media_type == format_media_type:
+            return name
+    if media_type in ("application/ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+async def _iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    pending = b""
+    async for chunk in chunks:
+        *lines, pending = (pending + chunk).split(b"\n")
+        for line in lines:
+            yield line
+    if pending:
+        yield pending
+
+def _decode_line(line: bytes, first: bool) -> str:
+    # A UTF-8 byte order mark may only start the upload
+    return line.decode("utf-8-sig" if first else "utf-8").rstrip("\r")
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'record'}: {detail['msg']}"
+        for detail in error.errors()
+    )
+
+def _parse_record(data) -> schemas.ProductCreate:
+    return schemas.ProductCreate.model_validate(data)
+
+def _csv_record(header, values) -> dict:
+    if len(values) != len(header):
+        raise ValueError(f"expected {len(header)} columns, got {len(values)}")
+    data = {}
+    for column, value in zip(header, values):
+        if value == "":
+            continue  # leave the schema default in place
+        data[column] = json.loads(value) if column in CSV_JSON_COLUMNS else value
+    return data
+
+async def iter_products(chunks: AsyncIterator[bytes], format: str) -> AsyncIterator[Tuple[int, Optional[schemas.ProductCreate], Optional[str]]]:
+    """Parse a streamed upload into (line number, product, error) tuples.
+
+    Exactly one of product/error is set. Records are parsed one at a time, so
+    memory use does not grow with the size of the upload.
+    """
+    header = None
+    record_lines = []
+    line_number = 0
+    async for raw_line in _iter_lines(chunks):
+        line_number += 1
+        try:
+            line = _decode_line(raw_line, line_number == 1)
+        except UnicodeDecodeError as e:
+            yield line_number, None, f"not valid UTF-8 (byte {e.start + 1} of the line)"
+            if format == "csv" and header is None:
+                return
+            # Drop the record the line belonged to and carry on with the next one
+            record_lines = []
+            continue
+        if format == "csv":
+            # A quoted CSV field may contain newlines; wait for the quotes to balance
+            record_lines.append(line)
+            record = "\n".join(record_lines)
+            if record.count('"') % 2:
+                continue
+            record_lines = []
+            start_line = line_number - record.count("\n")
+            if not record.strip():
+                continue
+            values = next(csv.reader([record]))
+            if header is None:
+                header = [column.strip() for column in values]
+                unknown = set(header) - set(CSV_COLUMNS)
+                if unknown:
+                    yield start_line, None, f"unknown columns: {', '.join(sorted(unknown))}"
+                    return
+                continue
+            try:
+                yield start_line, _parse_record(_csv_record(header, values)), None
+            except ValidationError as e:
+                yield start_line, None, _validation_message(e)
+            except ValueError as e:
+                yield start_line, None, str(e)
+        else:
+            if not line.strip():
+                continue
+            try:
+                yield line_number, _parse_record(json.loads(line)), None
+            except ValidationError as e:
+                yield line_number, None, _validation_message(e)
+            except ValueError as e:
+                yield line_number, None, f"invalid JSON: {e}"
+    if record_lines:
+        yield line_number, None, "unterminated quoted field"
+
+def product_record(product: models.Product) -> dict:
+    """A product as an importable ProductCreate document"""
+    return schemas.ProductCreate.model_validate(product, from_attributes=True).model_dump()
+
+def _csv_line(values) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="\n").writerow(values)
+    return buffer.getvalue()
+
+def encode_product(product: models.Product, format: str) -> str:
+    record = product_record(product)
+    if format == "csv":
+        return _csv_line([
+            "" if record[column] is None
+            else json.dumps(record[column]) if column in CSV_JSON_COLUMNS
+            else str(record[column]).lower() if isinstance(record[column], bool)
+            else record[column]
+            for column in CSV_COLUMNS
+        ])
+    return json.dumps(record) + "\n"
+
+def encode_products(products: Iterable[models.Product], format: str) -> Iterator[str]:
+    """Serialize products for a streaming response, flushing in EXPORT_CHUNK_SIZE chunks"""
+    parts = [_csv_line(CSV_COLUMNS)] if format == "csv" else []
+    size = sum(len(part) for part in parts)
+    for product in products:
+        part = encode_product(product, format)
+        parts.append(part)
+        size += len(part)
+        if size >= EXPORT_CHUNK_SIZE:
+            yield "".join(parts)
+            parts, size = [], 0
+    if parts:
+        yield "".join(parts)
@@ -0,0 +1,161 @@
+import gzip
+import threading
+import time
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "application/json",
+    "application/x-ndjson",
+    "application/javascript",
+    "image/svg+xml",
+    "text/",
+)
+
+def parse_accept_encoding(header: str) -> dict:
+    """Map each coding in an Accept-Encoding header to its q-value"""
+    codings = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        codings[coding.strip().lower()] = quality
+    return codings
+
+class CompressionStats:
+    """Per-route bytes before/after compression and time spent compressing"""
+
+    def __init__(self):
+        self._routes = {}
+        self._lock = threading.Lock()
+
+    def record(self, route: str, encoding: str, bytes_in: int, bytes_out: int, seconds: float):
+        with self._lock:
+            stats = self._routes.setdefault(route, {
+                "responses": 0, "compressed": 0, "bytes_in": 0, "bytes_out": 0, "compress_ms": 0.0, "encodings": {}
+            })
+            stats["responses"] += 1
+            stats["bytes_in"] += bytes_in
+            stats["bytes_out"] += bytes_out
+            if encoding != "identity":
+                stats["compressed"] += 1
+                stats["compress_ms"] += seconds * 1000
+                stats["encodings"][encoding] = stats["encodings"].get(encoding, 0) + 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            report = {}
+            for route, stats in self._routes.items():
+                report[route] = {
+                    **stats,
+                    "encodings": dict(stats["encodings"]),
+                    "compress_ms": round(stats["compress_ms"], 2),
+                    "ratio": round(stats["bytes_out"] / stats["bytes_in"], 4) if stats["bytes_in"] else 1.0,
+                }
+            return report
+
+class CompressionMiddleware:
+    """Negotiated brotli/gzip compression for buffered responses above a size threshold.
+
+    Streaming responses (more_body) and bodies that are already encoded, too
+    small, or not a compressible media type pass through untouched.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = 1024, gzip_level: int = 6,
+                 brotli_quality: int = 4, stats: CompressionStats = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.stats = stats or CompressionStats()
+
+    def _choose_encoding(self, scope: Scope) -> str:
+        accepted = parse_accept_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        wildcard = accepted.get("*", 0.0)
+        candidates = (["br"] if brotli is not None else []) + ["gzip"]
+        best, best_quality = "identity", 0.0
+        for coding in candidates:
+            quality = accepted.get(coding, wildcard)
+            if quality > best_quality:
+                best, best_quality = coding, quality
+        return best
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose_encoding(scope)
+        start_message = None
+        chunks = []
+        passthrough = False
+
+        async def send_wrapper(message: Message):
+            nonlocal start_message, passthrough
+            if passthrough:
+                await send(message)
+                return
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                # e.g. http.response.pathsend: the server sends the file itself
+                passthrough = True
+                await send(start_message)
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                # Streaming body: send what we have as-is and stop buffering
+                passthrough = True
+                await send(start_message)
+                await send({"type": "http.response.body", "body": b"".join(chunks), "more_body": True})
+                return
+            await self._send_buffered(scope, send, start_message, b"".join(chunks), encoding)
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _send_buffered(self, scope: Scope, send: Send, start_message: Message, body: bytes, encoding: str):
+        headers = MutableHeaders(scope=start_message)
+        route = getattr(scope.get("route"), "path", scope.get("path", ""))
+        content_type = headers.get("content-type", "")
+        compressible = (
+            encoding != "identity"
+            and len(body) >= self.minimum_size
+            and "content-encoding" not in headers
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+        bytes_in = len(body)
+        started = time.perf_counter()
+        if compressible:
+            body = self._compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            # The encoded bytes differ from the identity representation
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = f"W/{etag}"
+        if content_type.startswith(COMPRESSIBLE_TYPES):
+            headers.add_vary_header("Accept-Encoding")
+        self.stats.record(route, encoding if compressible else "identity", bytes_in, len(body),
+                          time.perf_counter() - started)
+        await send(start_message)
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,55 @@
+import hashlib
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+from fastapi import Request, Response
+
+def make_etag(*parts) -> str:
+    """Strong ETag for a representation identified by the given parts"""
+    digest = hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest()
+    return f'"{digest[:20]}"'
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+class Validators:
+    """ETag/Last-Modified for one response, plus the conditional-GET check"""
+
+    def __init__(self, request: Request, etag: str, last_modified: Optional[float], cache_control: str):
+        self.request = request
+        self.etag = etag
+        self.last_modified = last_modified
+        self.cache_control = cache_control
+
+    @property
+    def headers(self) -> dict:
+        headers = {"ETag": self.etag}
+        if self.cache_control:
+            headers["Cache-Control"] = self.cache_control
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        return headers
+
+    @property
+    def not_modified(self) -> bool:
+        if_none_match = self.request.headers.get("if-none-match")
+        if if_none_match is not None:
+            # If-None-Match takes precedence over If-Modified-Since
+            return _etag_matches(if_none_match, self.etag)
+        if_modified_since = self.request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return int(self.last_modified) <= since
+        return False
+
+    def apply(self, response: Response):
+        response.headers.update(self.headers)
+
+    def not_modified_response(self) -> Response:
+        return Response(status_code=304, headers=self.headers)
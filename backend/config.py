@@ -8,7 +8,98 @@ class Settings:
     ALGORITHM: str = os.getenv("ALGORITHM", "HS256")
     ACCESS_TOKEN_EXPIRE_MINUTES: int = int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30"))
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./sj_jewelry.db")
+    # Defaults to DATABASE_URL with its async driver (sqlite -> sqlite+aiosqlite)
+    ASYNC_DATABASE_URL: str = os.getenv("ASYNC_DATABASE_URL", "")
+    # SQLite performance profile, applied to every new connection; an empty value
+    # leaves that pragma at SQLite's default
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_BUSY_TIMEOUT_MS: str = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+    SQLITE_CACHE_SIZE: str = os.getenv("SQLITE_CACHE_SIZE", "-65536")  # negative: KiB, so 64 MiB
+    SQLITE_MMAP_SIZE: str = os.getenv("SQLITE_MMAP_SIZE", "268435456")  # bytes
+    SQLITE_TEMP_STORE: str = os.getenv("SQLITE_TEMP_STORE", "MEMORY")
+    # Connection pool per engine (sync and async)
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+    # Read replica for GET handlers; empty sends all traffic to DATABASE_URL
+    READ_REPLICA_URL: str = os.getenv("READ_REPLICA_URL", "")
+    # After a client's own write, its reads stay on the primary for this long
+    READ_YOUR_WRITES_SECONDS: float = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+    # When both URLs are SQLite files, copy the primary into the replica with the
+    # backup API on this interval (a local stand-in for real replication); 0 disables
+    SQLITE_REPLICA_SYNC_SECONDS: float = float(os.getenv("SQLITE_REPLICA_SYNC_SECONDS", "2"))
     ADMIN_EMAIL: str = os.getenv("ADMIN_EMAIL", "admin@sjewelry.com")
     ADMIN_PASSWORD: str = os.getenv("ADMIN_PASSWORD", "admin123")
+    # How list endpoints load related rows: "selectin" (one extra IN query per
+    # relationship) or "joined" (LEFT OUTER JOIN in the main query)
+    EAGER_LOADING_STRATEGY: str = os.getenv("EAGER_LOADING_STRATEGY", "selectin")
+    # Processes used for bcrypt hashing/verification; 0 runs it on the default thread pool
+    PASSWORD_HASH_WORKERS: int = int(os.getenv("PASSWORD_HASH_WORKERS", "2"))
+    # Authenticated principals cached by token subject; size 0 disables the cache
+    PRINCIPAL_CACHE_SIZE: int = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+    PRINCIPAL_CACHE_TTL_SECONDS: float = float(os.getenv("PRINCIPAL_CACHE_TTL_SECONDS", "60"))
+    # Product ids on each user's wishlist, for /wishlist/contains. Writes in this
+    # process invalidate a user's entry; the TTL bounds staleness across processes
+    WISHLIST_CACHE_SIZE: int = int(os.getenv("WISHLIST_CACHE_SIZE", "10000"))
+    WISHLIST_CACHE_TTL_SECONDS: float = float(os.getenv("WISHLIST_CACHE_TTL_SECONDS", "60"))
+    # In-memory catalog for /products reads; reloaded from the database on this
+    # interval to pick up writes made by other worker processes
+    CATALOG_CACHE_ENABLED: bool = os.getenv("CATALOG_CACHE_ENABLED", "true").lower() == "true"
+    CATALOG_CACHE_REFRESH_SECONDS: float = float(os.getenv("CATALOG_CACHE_REFRESH_SECONDS", "300"))
+    # Cache-Control sent with ETag'd catalog responses (product lists/search, single product)
+    CATALOG_CACHE_CONTROL: str = os.getenv("CATALOG_CACHE_CONTROL", "public, max-age=60, stale-while-revalidate=300")
+    PRODUCT_CACHE_CONTROL: str = os.getenv("PRODUCT_CACHE_CONTROL", "public, max-age=300, stale-while-revalidate=600")
+    # "auto" uses orjson unless FastAPI already serializes response models in pydantic-core;
+    # "orjson" or "default" force a choice
+    JSON_RESPONSE_CLASS: str = os.getenv("JSON_RESPONSE_CLASS", "auto")
+    # Responses smaller than this many bytes are sent uncompressed
+    COMPRESSION_MIN_SIZE: int = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+    COMPRESSION_GZIP_LEVEL: int = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+    COMPRESSION_BROTLI_QUALITY: int = int(os.getenv("COMPRESSION_BROTLI_QUALITY", "4"))
+    # Size limits for account application documents, per detected type
+    DOCUMENT_MAX_PDF_BYTES: int = int(os.getenv("DOCUMENT_MAX_PDF_BYTES", str(10 * 1024 * 1024)))
+    DOCUMENT_MAX_IMAGE_BYTES: int = int(os.getenv("DOCUMENT_MAX_IMAGE_BYTES", str(5 * 1024 * 1024)))
+    # Hand document downloads to a front proxy after authorization: "X-Accel-Redirect"
+    # (nginx, internal location at DOCUMENT_SENDFILE_PREFIX) or "X-Sendfile" (Apache,
+    # lighttpd; absolute file path). Empty streams the file from the API process
+    DOCUMENT_SENDFILE_HEADER: str = os.getenv("DOCUMENT_SENDFILE_HEADER", "")
+    DOCUMENT_SENDFILE_PREFIX: str = os.getenv("DOCUMENT_SENDFILE_PREFIX", "/protected-documents/")
+    # Background WebP previews of uploaded documents: worker processes (0 uses
+    # the default thread pool) and the longest edge of each rendition in pixels
+    PREVIEW_WORKERS: int = int(os.getenv("PREVIEW_WORKERS", "1"))
+    DOCUMENT_THUMBNAIL_SIZE: int = int(os.getenv("DOCUMENT_THUMBNAIL_SIZE", "256"))
+    DOCUMENT_PREVIEW_SIZE: int = int(os.getenv("DOCUMENT_PREVIEW_SIZE", "1200"))
+    # Product images: upload limit for originals, processes rendering resized
+    # variants (0 uses the default thread pool) and the disk budget for those variants
+    PRODUCT_IMAGE_MAX_BYTES: int = int(os.getenv("PRODUCT_IMAGE_MAX_BYTES", str(10 * 1024 * 1024)))
+    PRODUCT_IMAGE_WORKERS: int = int(os.getenv("PRODUCT_IMAGE_WORKERS", "2"))
+    PRODUCT_IMAGE_CACHE_BYTES: int = int(os.getenv("PRODUCT_IMAGE_CACHE_BYTES", str(512 * 1024 * 1024)))
+    # Origin prepended to generated media URLs (product image src/srcset)
+    PUBLIC_BASE_URL: str = os.getenv("PUBLIC_BASE_URL", "http://localhost:8000")
+    # How long a pending order holds its stock, and how often lapsed reservations
+    # are released (0 disables the sweeper)
+    STOCK_RESERVATION_MINUTES: float = float(os.getenv("STOCK_RESERVATION_MINUTES", "15"))
+    RESERVATION_SWEEP_SECONDS: float = float(os.getenv("RESERVATION_SWEEP_SECONDS", "60"))
+    # How often the dashboard counters are recomputed from full table scans to
+    # correct any drift (0 disables); between runs they are kept up to date by writes
+    STATS_RECONCILE_SECONDS: float = float(os.getenv("STATS_RECONCILE_SECONDS", "3600"))
+    # Rows each dashboard counter is spread over, so concurrent checkouts rarely
+    # update the same row; reads add the rows up
+    STAT_COUNTER_SHARDS: int = int(os.getenv("STAT_COUNTER_SHARDS", "8"))
+    # Idempotency-Key responses are replayed for this long; a duplicate of a request
+    # still running in another process waits up to IDEMPOTENCY_WAIT_SECONDS for it
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "86400"))
+    IDEMPOTENCY_CACHE_SIZE: int = int(os.getenv("IDEMPOTENCY_CACHE_SIZE", "10000"))
+    IDEMPOTENCY_WAIT_SECONDS: float = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "30"))
+    # A running request holds its key on a lease renewed every third of this, so a
+    # retry can take the key over only once the worker holding it has died
+    IDEMPOTENCY_LEASE_SECONDS: float = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+    # Apply Alembic migrations when the API starts; disable to run `alembic upgrade head` separately
+    AUTO_MIGRATE: bool = os.getenv("AUTO_MIGRATE", "true").lower() == "true"
+    # Rows per transaction for bulk product import, and per fetch for export
+    BULK_IMPORT_BATCH_SIZE: int = int(os.getenv("BULK_IMPORT_BATCH_SIZE", "500"))
+    BULK_EXPORT_BATCH_SIZE: int = int(os.getenv("BULK_EXPORT_BATCH_SIZE", "500"))
 
 settings = Settings()
@@ -1,11 +1,105 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
-from typing import List, Optional
+from sqlalchemy.orm import Session, aliased, contains_eager, joinedload, selectinload
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy import and_, or_, select, insert, update, delete, func, case, literal
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.sql.expression import ClauseElement
+import random
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from datetime import datetime, timedelta, timezone
 import models
 import schemas
-from passlib.context import CryptContext
+import search
+import attributes
+from pagination import paginate
+from config import settings
+from cache import principal_cache, wishlist_cache
+from catalog import catalog_cache
+from passwords import pwd_context
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Storefront price range filters: label -> (min, max); max None is open-ended
+PRICE_RANGES = {
+    "under-100": (0, 100),
+    "100-500": (100, 500),
+    "500-1000": (500, 1000),
+    "1000-2500": (1000, 2500),
+    "over-2500": (2500, None),
+}
+
+FACET_FIELDS = ["category", "material", "gemstone", "occasion"]
+
+EAGER_LOADERS = {"selectin": selectinload, "joined": joinedload}
+
+# Dialect INSERT constructs that support ON CONFLICT clauses
+CONFLICT_INSERTS = {"sqlite": sqlite_insert, "postgresql": postgresql_insert}
+
+# Dashboard counters kept in stat_counters; orders and revenue leave out expired orders
+STAT_COUNTERS = ["users", "products", "orders", "revenue"]
+
+# Account application document fields: <prefix>_file_path and <prefix>_sha256
+DOCUMENT_FIELDS = ["driver_license", "sales_tax_permit", "lease_agreement"]
+
+def eager_load(*path):
+    """Loader option that eagerly loads a relationship path with the configured strategy"""
+    if settings.EAGER_LOADING_STRATEGY not in EAGER_LOADERS:
+        raise ValueError(f"Unknown EAGER_LOADING_STRATEGY: {settings.EAGER_LOADING_STRATEGY}")
+    loader = EAGER_LOADERS[settings.EAGER_LOADING_STRATEGY]
+    option = loader(path[0])
+    for attribute in path[1:]:
+        option = getattr(option, loader.__name__)(attribute)
+    return option
+
+def _conflict_insert(db: Session, model):
+    """INSERT for model with on_conflict_do_nothing/do_update, or None where the database has neither"""
+    insert_for_dialect = CONFLICT_INSERTS.get(db.get_bind().dialect.name)
+    return None if insert_for_dialect is None else insert_for_dialect(model)
+
+def insert_ignoring_conflicts(db: Session, model, rows: List[dict], index_elements: List[str]):
+    """Insert rows, skipping those that collide with an existing row on index_elements (no commit)"""
+    statement = _conflict_insert(db, model)
+    if statement is not None:
+        db.execute(statement.on_conflict_do_nothing(index_elements=index_elements), rows)
+        return
+    # Elsewhere each row gets a savepoint, so a duplicate only rolls back its own insert
+    for row in rows:
+        try:
+            with db.begin_nested():
+                db.execute(insert(model).values(**row))
+        except IntegrityError:
+            pass
+
+def upsert(db: Session, model, rows: List[dict], index_elements: List[str], set_):
+    """Insert rows, updating those that collide on index_elements instead (no commit).
+
+    set_(excluded) gives the columns to update, where excluded holds the
+    proposed row's values. A single row may carry SQL expressions as values.
+    """
+    statement = _conflict_insert(db, model)
+    if statement is not None:
+        if len(rows) == 1:
+            statement = statement.values(**rows[0])
+        statement = statement.on_conflict_do_update(index_elements=index_elements, set_=set_(statement.excluded))
+        db.execute(statement) if len(rows) == 1 else db.execute(statement, rows)
+        return
+    # Elsewhere: update, and insert when nothing matched; an insert that loses
+    # a race with a concurrent one falls back to updating the row it created
+    for row in rows:
+        excluded = SimpleNamespace(**{
+            column: value if isinstance(value, ClauseElement) else literal(value) for column, value in row.items()
+        })
+        match = and_(*(getattr(model, column) == row[column] for column in index_elements))
+        while not db.execute(update(model).where(match).values(set_(excluded))).rowcount:
+            try:
+                with db.begin_nested():
+                    db.execute(insert(model).values(**row))
+                break
+            except IntegrityError:
+                continue
+
+def _product_query(db: Session):
+    return db.query(models.Product).options(eager_load(models.Product.images), eager_load(models.Product.variants))
 
 def get_password_hash(password):
     return pwd_context.hash(password)
@@ -20,8 +114,10 @@ def get_user_by_email(db: Session, email: str):
 def get_users(db: Session, skip: int = 0, limit: int = 100):
     return db.query(models.User).offset(skip).limit(limit).all()
 
-def create_user(db: Session, user: schemas.UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: schemas.UserCreate, hashed_password: Optional[str] = None):
+    # Async callers hash in the password pool and pass the result in
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
     db_user = models.User(
         email=user.email,
         name=user.name,
@@ -29,6 +125,7 @@ def create_user(db: Session, user: schemas.UserCreate):
         hashed_password=hashed_password
     )
     db.add(db_user)
+    _bump_counters(db, users=1)
     db.commit()
     db.refresh(db_user)
     return db_user
@@ -44,11 +141,61 @@ def update_user(db: Session, user_id: int, user_update: schemas.UserUpdate):
     
     db.commit()
     db.refresh(db_user)
+    principal_cache.invalidate(db_user.email)
     return db_user
 
 # Product CRUD operations
+def sync_product_attributes(db_product: models.Product):
+    """Rebuild the normalized attribute rows from the product's specifications"""
+    db_product.attributes = [
+        models.ProductAttribute(name=name, value=value)
+        for name, value in attributes.derive_attributes(db_product.specifications)
+    ]
+
+def rebuild_product_attributes(db: Session):
+    for db_product in db.query(models.Product).all():
+        sync_product_attributes(db_product)
+    db.commit()
+
+def _attribute_filter(name: str, values: List[str]):
+    return models.Product.id.in_(
+        select(models.ProductAttribute.product_id).where(
+            models.ProductAttribute.name == name,
+            models.ProductAttribute.value.in_(values)
+        )
+    )
+
+def _reload_product(db: Session, product_id: int):
+    # Re-select with loader options so relationships are populated after a
+    # commit; async callers cannot lazy-load them later
+    return _product_query(db).populate_existing().filter(models.Product.id == product_id).first()
+
+def load_catalog(db: Session) -> bool:
+    """Reload the in-memory catalog; returns False if a concurrent write made the read stale"""
+    started_at_version = catalog_cache.version
+    catalog_cache.load(_product_query(db).all(), started_at_version)
+    return not catalog_cache.needs_load()
+
+def get_catalog_fingerprint(db: Session):
+    """(token, last modified epoch) that changes whenever a product row is added, changed or removed"""
+    count, max_id, revisions, max_created, max_updated = db.query(
+        func.count(models.Product.id),
+        func.max(models.Product.id),
+        func.coalesce(func.sum(models.Product.revision), 0),
+        func.max(models.Product.created_at),
+        func.max(models.Product.updated_at)
+    ).one()
+    token = f"{count}-{max_id}-{revisions}"
+    last_modified = max([value for value in (max_created, max_updated) if value is not None], default=None)
+    if last_modified is None:
+        return token, None
+    # SQLite stores CURRENT_TIMESTAMP as naive UTC
+    if last_modified.tzinfo is None:
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    return token, last_modified.timestamp()
+
 def get_product(db: Session, product_id: int):
-    return db.query(models.Product).filter(models.Product.id == product_id).first()
+    return _product_query(db).filter(models.Product.id == product_id).first()
 
 def get_products(
     db: Session, 
@@ -61,9 +208,10 @@ def get_products(
     in_stock: Optional[bool] = None,
     new_arrivals: Optional[bool] = None,
     certified: Optional[bool] = None,
-    customizable: Optional[bool] = None
+    customizable: Optional[bool] = None,
+    cursor: Optional[str] = None
 ):
-    query = db.query(models.Product)
+    query = _product_query(db)
     
     if category:
         query = query.filter(models.Product.category == category)
@@ -82,13 +230,19 @@ def get_products(
     if customizable is not None:
         query = query.filter(models.Product.customizable == customizable)
     
-    return query.offset(skip).limit(limit).all()
+    return paginate(query, [models.Product.id], skip, limit, cursor)
 
-def search_products(db: Session, query: str, filters: Optional[schemas.ProductFilters] = None, skip: int = 0, limit: int = 20):
-    search_query = db.query(models.Product)
+def _filter_products(search_query, query: Optional[str], filters: Optional[schemas.ProductFilters]):
+    """Apply text search and filters; returns the query and the columns that order its results"""
+    sort_columns = [models.Product.id]
     
-    # Text search
-    if query:
+    # Text search: ranked full-text match when the FTS index is available
+    match_expression = search.build_match_expression(query) if query else ""
+    if match_expression and search.is_enabled():
+        matches = search.ranked_matches(match_expression).subquery()
+        search_query = search_query.join(matches, matches.c.product_id == models.Product.id)
+        sort_columns = [matches.c.rank, models.Product.id]
+    elif query:
         search_query = search_query.filter(
             or_(
                 models.Product.name.ilike(f"%{query}%"),
@@ -108,6 +262,12 @@ def search_products(db: Session, query: str, filters: Optional[schemas.ProductFi
             search_query = search_query.filter(models.Product.gemstone.in_(filters.gemstone))
         if filters.occasion:
             search_query = search_query.filter(models.Product.occasion.in_(filters.occasion))
+        if filters.metal_type:
+            search_query = search_query.filter(_attribute_filter(attributes.METAL_TYPE, filters.metal_type))
+        if filters.metal_tone:
+            search_query = search_query.filter(_attribute_filter(attributes.METAL_TONE, filters.metal_tone))
+        if filters.diamond_weight:
+            search_query = search_query.filter(_attribute_filter(attributes.DIAMOND_WEIGHT, filters.diamond_weight))
         if filters.price_min is not None:
             search_query = search_query.filter(models.Product.sale_price >= filters.price_min)
         if filters.price_max is not None:
@@ -121,7 +281,59 @@ def search_products(db: Session, query: str, filters: Optional[schemas.ProductFi
         if filters.customizable is not None:
             search_query = search_query.filter(models.Product.customizable == filters.customizable)
     
-    return search_query.offset(skip).limit(limit).all()
+    return search_query, sort_columns
+
+def search_products(db: Session, query: str, filters: Optional[schemas.ProductFilters] = None, skip: int = 0, limit: int = 20, cursor: Optional[str] = None):
+    search_query, sort_columns = _filter_products(_product_query(db), query, filters)
+    return paginate(search_query, sort_columns, skip, limit, cursor)
+
+def get_product_facets(db: Session, query: Optional[str], filters: Optional[schemas.ProductFilters] = None):
+    """Facet counts for the products matching a search, from one grouped query"""
+    # Each range counts what filtering on it returns, and the price filter is
+    # inclusive at both ends: a price on a shared bound lands in every range
+    # holding it, as a comma-joined bucket split apart below
+    shared_bounds = {}
+    for price_min, price_max in PRICE_RANGES.values():
+        for bound in (price_min, price_max):
+            if bound is not None:
+                shared_bounds[bound] = [
+                    label for label, (low, high) in PRICE_RANGES.items()
+                    if low <= bound and (high is None or bound <= high)
+                ]
+    price_bucket = case(
+        *[
+            (models.Product.sale_price == bound, ",".join(labels))
+            for bound, labels in shared_bounds.items() if len(labels) > 1
+        ],
+        *[
+            (
+                and_(
+                    models.Product.sale_price >= price_min,
+                    True if price_max is None else models.Product.sale_price <= price_max
+                ),
+                label
+            )
+            for label, (price_min, price_max) in PRICE_RANGES.items()
+        ],
+        else_=None
+    )
+    facet_columns = [getattr(models.Product, field) for field in FACET_FIELDS]
+    facet_query = db.query(*facet_columns, price_bucket, func.count(models.Product.id))
+    facet_query, _ = _filter_products(facet_query, query, filters)
+    rows = facet_query.group_by(*facet_columns, price_bucket).all()
+    
+    # Roll the per-combination counts up into one count table per facet
+    facets = {field: {} for field in FACET_FIELDS + ["price_range"]}
+    total = 0
+    for row in rows:
+        count = row[-1]
+        total += count
+        for field, value in zip(FACET_FIELDS, row[:-2]):
+            if value is not None:
+                facets[field][value] = facets[field].get(value, 0) + count
+        for label in (row[-2].split(",") if row[-2] else []):
+            facets["price_range"][label] = facets["price_range"].get(label, 0) + count
+    return {"total": total, **facets}
 
 def create_product(db: Session, product: schemas.ProductCreate):
     db_product = models.Product(
@@ -134,29 +346,106 @@ def create_product(db: Session, product: schemas.ProductCreate):
         material=product.material,
         gemstone=product.gemstone,
         occasion=product.occasion,
-        in_stock=product.in_stock,
+        in_stock=product.in_stock if product.stock_quantity is None else product.stock_quantity > 0,
+        stock_quantity=product.stock_quantity,
         new_arrivals=product.new_arrivals,
         certified=product.certified,
         customizable=product.customizable,
         specifications=product.specifications
     )
+    db_product.images = [
+        models.ProductImage(**image_data.dict())
+        for image_data in product.images
+    ]
+    sync_product_attributes(db_product)
     db.add(db_product)
+    _bump_counters(db, products=1)
     db.commit()
-    db.refresh(db_product)
-    
-    # Add images
-    for image_data in product.images:
-        db_image = models.ProductImage(
-            product_id=db_product.id,
-            src=image_data.src,
-            alt=image_data.alt,
-            is_primary=image_data.is_primary
+    db_product = _reload_product(db, db_product.id)
+    catalog_cache.upsert(db_product)
+    return db_product
+
+def bulk_upsert_products(db: Session, products: List[schemas.ProductCreate]) -> dict:
+    """Insert or update a batch of products, matched by name, in one transaction.
+
+    Product, image and attribute rows go through executemany-style bulk
+    statements. An existing product only has the fields a record sets
+    updated; its images (and attributes, with specifications) are replaced
+    when the record includes them. A name repeated within the batch keeps its
+    last occurrence.
+    """
+    by_name = {product.name: product for product in products}
+    if not by_name:
+        return {"created": 0, "updated": 0}
+    product_ids = dict(
+        db.query(models.Product.name, models.Product.id)
+        .filter(models.Product.name.in_(list(by_name)))
+        .all()
+    )
+    new_names = {name for name in by_name if name not in product_ids}
+    new_rows, updated_rows = [], []
+    for name, product in by_name.items():
+        if name in new_names:
+            new_rows.append(product.model_dump(exclude={"images"}))
+        else:
+            # Columns the record omits (e.g. no stock_quantity column) keep their values
+            updated_rows.append({"id": product_ids[name], **product.model_dump(exclude={"images"}, exclude_unset=True)})
+    # New products get their images and attributes; existing ones only when the record sets them
+    replaced_images = {
+        product_ids[name] for name, product in by_name.items()
+        if name not in new_names and "images" in product.model_fields_set
+    }
+    replaced_attributes = {
+        product_ids[name] for name, product in by_name.items()
+        if name not in new_names and "specifications" in product.model_fields_set
+    }
+
+    if new_rows:
+        inserted = db.execute(
+            insert(models.Product).returning(models.Product.id, models.Product.name, sort_by_parameter_order=True),
+            new_rows
         )
-        db.add(db_image)
-    
+        product_ids.update({name: product_id for product_id, name in inserted})
+    if updated_rows:
+        db.execute(update(models.Product), updated_rows)
+        db.execute(delete(models.ProductImage).where(models.ProductImage.product_id.in_(replaced_images)))
+        db.execute(delete(models.ProductAttribute).where(models.ProductAttribute.product_id.in_(replaced_attributes)))
+
+    image_rows = [
+        {"product_id": product_ids[name], **image.dict()}
+        for name, product in by_name.items() for image in product.images
+        if name in new_names or product_ids[name] in replaced_images
+    ]
+    attribute_rows = [
+        {"product_id": product_ids[name], "name": attribute, "value": value}
+        for name, product in by_name.items()
+        for attribute, value in attributes.derive_attributes(product.specifications)
+        if name in new_names or product_ids[name] in replaced_attributes
+    ]
+    if image_rows:
+        db.execute(insert(models.ProductImage), image_rows)
+    if attribute_rows:
+        db.execute(insert(models.ProductAttribute), attribute_rows)
+    _refresh_in_stock(db, product_ids.values())
+    _bump_counters(db, products=len(new_rows))
     db.commit()
-    db.refresh(db_product)
-    return db_product
+
+    if catalog_cache.enabled:
+        catalog_cache.upsert_many(
+            _product_query(db).filter(models.Product.id.in_(list(product_ids.values()))).all()
+        )
+    return {"created": len(new_rows), "updated": len(updated_rows)}
+
+def iter_products_for_export(db: Session, batch_size: int):
+    """Stream every product with its images, fetching batch_size rows at a time"""
+    statement = (
+        select(models.Product)
+        .options(selectinload(models.Product.images))
+        .order_by(models.Product.id)
+        .execution_options(yield_per=batch_size)
+    )
+    for product in db.scalars(statement):
+        yield product
 
 def update_product(db: Session, product_id: int, product_update: schemas.ProductUpdate):
     db_product = get_product(db, product_id)
@@ -166,85 +455,363 @@ def update_product(db: Session, product_id: int, product_update: schemas.Product
     update_data = product_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_product, field, value)
+    if "specifications" in update_data:
+        sync_product_attributes(db_product)
+    db.flush()
+    _refresh_in_stock(db, [product_id])
     
     db.commit()
-    db.refresh(db_product)
+    db_product = _reload_product(db, db_product.id)
+    catalog_cache.upsert(db_product)
+    return db_product
+
+def add_product_image(db: Session, product_id: int, image: schemas.ProductImageCreate):
+    """Attach an image to a product; a new primary image demotes the previous one"""
+    db_product = get_product(db, product_id)
+    if not db_product:
+        return None
+
+    if image.is_primary:
+        for existing in db_product.images:
+            existing.is_primary = False
+    db_product.images.append(models.ProductImage(**image.dict()))
+    # Images live in their own table; bump the product so fingerprints see them
+    db_product.revision = models.Product.revision + 1
+    db.commit()
+    db_product = _reload_product(db, db_product.id)
+    catalog_cache.upsert(db_product)
     return db_product
 
 def delete_product(db: Session, product_id: int):
+    """Delete a product and its variants; None if not found, False while order items still refer to it"""
     db_product = get_product(db, product_id)
     if not db_product:
+        return None
+    # Order items point at the product and possibly its variants, which the
+    # delete would cascade away (see delete_product_variant)
+    ordered = db.execute(
+        select(models.OrderItem.id).where(models.OrderItem.product_id == product_id).limit(1)
+    ).first()
+    if ordered is not None:
         return False
     
     db.delete(db_product)
+    _bump_counters(db, products=-1)
     db.commit()
+    catalog_cache.remove(product_id)
     return True
 
+# Inventory operations
+def _refresh_in_stock(db: Session, product_ids) -> list:
+    """Re-derive in_stock where stock is tracked; returns (id, in_stock, stock_quantity, updated_at) rows"""
+    variants = select(models.ProductVariant.id).where(models.ProductVariant.product_id == models.Product.id)
+    statement = (
+        update(models.Product)
+        .where(models.Product.id.in_(list(product_ids)))
+        .values(in_stock=case(
+            (variants.exists(), variants.where(models.ProductVariant.stock_quantity > 0).exists()),
+            (models.Product.stock_quantity.isnot(None), models.Product.stock_quantity > 0),
+            else_=models.Product.in_stock
+        ))
+        .returning(models.Product.id, models.Product.in_stock, models.Product.stock_quantity, models.Product.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    return db.execute(statement).all()
+
+def _take_stock(db: Session, model, quantities: Dict[int, int]) -> Dict[int, int]:
+    """Decrement stock_quantity of each row that still holds enough units; returns {id: remaining}.
+
+    A single conditional UPDATE covers every row: the check and the decrement
+    happen at write time, so concurrent checkouts cannot oversell, and on
+    databases with row locks they only contend on the rows they share.
+    """
+    amount = case(quantities, value=model.id)
+    statement = (
+        update(model)
+        .where(model.id.in_(list(quantities)), model.stock_quantity >= amount)
+        .values(stock_quantity=model.stock_quantity - amount)
+        .returning(model.id, model.stock_quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return dict(db.execute(statement).all())
+
+def _return_stock(db: Session, model, quantities: Dict[int, int]) -> Dict[int, int]:
+    amount = case(quantities, value=model.id)
+    statement = (
+        update(model)
+        .where(model.id.in_(list(quantities)), model.stock_quantity.isnot(None))
+        .values(stock_quantity=model.stock_quantity + amount)
+        .returning(model.id, model.stock_quantity)
+        .execution_options(synchronize_session=False)
+    )
+    return dict(db.execute(statement).all())
+
+def get_product_variant_by_sku(db: Session, sku: str):
+    return db.query(models.ProductVariant).filter(models.ProductVariant.sku == sku).first()
+
+def _save_variants(db: Session, product_id: int):
+    db.flush()
+    _refresh_in_stock(db, [product_id])
+    db.commit()
+    db_product = _reload_product(db, product_id)
+    catalog_cache.upsert(db_product)
+    return db_product
+
+def create_product_variant(db: Session, product_id: int, variant: schemas.ProductVariantCreate):
+    db_product = get_product(db, product_id)
+    if not db_product:
+        return None
+    db_product.variants.append(models.ProductVariant(**variant.dict()))
+    return _save_variants(db, product_id)
+
+def update_product_variant(db: Session, product_id: int, variant_id: int, variant_update: schemas.ProductVariantUpdate):
+    db_variant = db.query(models.ProductVariant).filter(
+        models.ProductVariant.id == variant_id, models.ProductVariant.product_id == product_id
+    ).first()
+    if not db_variant:
+        return None
+    for field, value in variant_update.dict(exclude_unset=True).items():
+        setattr(db_variant, field, value)
+    return _save_variants(db, product_id)
+
+def delete_product_variant(db: Session, product_id: int, variant_id: int):
+    """Delete a variant; None if not found, False while order items still refer to it"""
+    db_variant = db.query(models.ProductVariant).filter(
+        models.ProductVariant.id == variant_id, models.ProductVariant.product_id == product_id
+    ).first()
+    if not db_variant:
+        return None
+    ordered = db.execute(
+        select(models.OrderItem.id).where(models.OrderItem.variant_id == variant_id).limit(1)
+    ).first()
+    if ordered is not None:
+        return False
+    db.delete(db_variant)
+    return _save_variants(db, product_id)
+
 # Order CRUD operations
+def _order_query(db: Session):
+    return db.query(models.Order).options(eager_load(models.Order.items))
+
 def get_order(db: Session, order_id: int):
-    return db.query(models.Order).filter(models.Order.id == order_id).first()
+    return _order_query(db).filter(models.Order.id == order_id).first()
+
+def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = _order_query(db).filter(models.Order.user_id == user_id)
+    return paginate(query, [models.Order.id], skip, limit, cursor)
 
-def get_user_orders(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.Order).filter(models.Order.user_id == user_id).offset(skip).limit(limit).all()
+class OrderRejected(ValueError):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
 
 def create_order(db: Session, order: schemas.OrderCreate, user_id: int):
+    """Place an order priced from the catalog, reserving its stock, in one transaction.
+
+    Products and their variants are read in two queries. Tracked stock is
+    taken with one conditional UPDATE per table; if any line cannot be filled
+    the transaction is rolled back, so a rejected order writes nothing. With
+    order.reserve the order only holds its stock until reserved_until (see
+    confirm_order and release_expired_reservations).
+    """
+    if not order.items:
+        raise OrderRejected(400, "An order needs at least one item")
+    if any(item.quantity < 1 for item in order.items):
+        raise OrderRejected(400, "Item quantities must be at least 1")
+
+    product_ids = {item.product_id for item in order.items}
+    products = {
+        row.id: row for row in db.execute(
+            select(models.Product.id, models.Product.name, models.Product.sale_price,
+                   models.Product.in_stock, models.Product.stock_quantity)
+            .where(models.Product.id.in_(product_ids))
+        )
+    }
+    missing = sorted(product_ids - products.keys())
+    if missing:
+        raise OrderRejected(404, f"Products not found: {', '.join(map(str, missing))}")
+    variants = {
+        row.id: row for row in db.execute(
+            select(models.ProductVariant.id, models.ProductVariant.product_id, models.ProductVariant.sku)
+            .where(models.ProductVariant.product_id.in_(product_ids))
+        )
+    }
+    with_variants = {variant.product_id for variant in variants.values()}
+
+    product_quantities, variant_quantities = Counter(), Counter()
+    out_of_stock = set()
+    for item in order.items:
+        product = products[item.product_id]
+        if item.variant_id is not None:
+            variant = variants.get(item.variant_id)
+            if variant is None or variant.product_id != item.product_id:
+                raise OrderRejected(404, f"Variant {item.variant_id} not found for {product.name}")
+            variant_quantities[item.variant_id] += item.quantity
+        elif item.product_id in with_variants:
+            raise OrderRejected(400, f"Choose a variant of {product.name}")
+        elif product.stock_quantity is not None:
+            product_quantities[item.product_id] += item.quantity
+        elif not product.in_stock:
+            # Untracked stock: the admin-set flag decides
+            out_of_stock.add(product.name)
+    if out_of_stock:
+        raise OrderRejected(409, f"Out of stock: {', '.join(sorted(out_of_stock))}")
+
+    product_levels = _take_stock(db, models.Product, product_quantities) if product_quantities else {}
+    variant_levels = _take_stock(db, models.ProductVariant, variant_quantities) if variant_quantities else {}
+    short = [products[product_id].name for product_id in product_quantities if product_id not in product_levels]
+    short += [
+        f"{products[variants[variant_id].product_id].name} ({variants[variant_id].sku})"
+        for variant_id in variant_quantities if variant_id not in variant_levels
+    ]
+    if short:
+        db.rollback()
+        raise OrderRejected(409, f"Not enough stock: {', '.join(short)}")
+
+    items = [
+        {"product_id": item.product_id, "variant_id": item.variant_id, "quantity": item.quantity,
+         "price": products[item.product_id].sale_price}
+        for item in order.items
+    ]
+    # Stock is only held on a deadline when the client confirms separately (two-step checkout)
+    reserved = order.reserve and bool(product_levels or variant_levels)
+    total_amount = round(sum(item["price"] * item["quantity"] for item in items), 2)
     db_order = models.Order(
         user_id=user_id,
-        total_amount=order.total_amount,
-        status=order.status,
-        shipping_address=order.shipping_address
+        total_amount=total_amount,
+        status="pending",
+        shipping_address=order.shipping_address,
+        reserved_until=datetime.utcnow() + timedelta(minutes=settings.STOCK_RESERVATION_MINUTES) if reserved else None
     )
     db.add(db_order)
+    db.flush()
+    db.execute(insert(models.OrderItem), [{"order_id": db_order.id, **item} for item in items])
+    stock = _refresh_in_stock(db, set(product_levels) | {variants[variant_id].product_id for variant_id in variant_levels})
+    _bump_counters(db, orders=1, revenue=total_amount)
     db.commit()
-    db.refresh(db_order)
-    
-    # Add order items
-    for item_data in order.items:
-        db_item = models.OrderItem(
-            order_id=db_order.id,
-            product_id=item_data.product_id,
-            quantity=item_data.quantity,
-            price=item_data.price
+    if stock:
+        catalog_cache.update_stock(stock, variant_levels)
+    return _order_query(db).populate_existing().filter(models.Order.id == db_order.id).first()
+
+def confirm_order(db: Session, order_id: int, user_id: int):
+    """Confirm a pending order so its reserved stock is kept; None if not found, False if no longer pending"""
+    confirmed = db.execute(
+        update(models.Order)
+        .where(
+            models.Order.id == order_id, models.Order.user_id == user_id, models.Order.status == "pending",
+            # A lapsed reservation is as good as expired, even before the sweep gets to it
+            or_(models.Order.reserved_until.is_(None), models.Order.reserved_until > datetime.utcnow())
         )
-        db.add(db_item)
-    
+        .values(status="confirmed", reserved_until=None)
+        .returning(models.Order.id)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if confirmed is None:
+        db_order = get_order(db, order_id)
+        return None if db_order is None or db_order.user_id != user_id else False
+    db.commit()
+    return _order_query(db).populate_existing().filter(models.Order.id == order_id).first()
+
+def release_expired_reservations(db: Session, limit: int = 500) -> int:
+    """Expire pending orders whose reservation lapsed and put their stock back; returns how many"""
+    now = datetime.utcnow()
+    lapsed = (models.Order.status == "pending", models.Order.reserved_until <= now)
+    expired = dict(db.execute(
+        update(models.Order)
+        .where(models.Order.id.in_(select(models.Order.id).where(*lapsed).limit(limit)), *lapsed)
+        .values(status="expired", reserved_until=None)
+        .returning(models.Order.id, models.Order.total_amount)
+        .execution_options(synchronize_session=False)
+    ).all())
+    expired_ids = list(expired)
+    if not expired_ids:
+        db.rollback()
+        return 0
+
+    rows = db.execute(
+        select(models.OrderItem.product_id, models.OrderItem.variant_id, func.sum(models.OrderItem.quantity))
+        .where(models.OrderItem.order_id.in_(expired_ids))
+        .group_by(models.OrderItem.product_id, models.OrderItem.variant_id)
+    ).all()
+    product_quantities = {product_id: quantity for product_id, variant_id, quantity in rows if variant_id is None}
+    variant_quantities = {variant_id: quantity for _, variant_id, quantity in rows if variant_id is not None}
+    if product_quantities:
+        _return_stock(db, models.Product, product_quantities)
+    variant_levels = _return_stock(db, models.ProductVariant, variant_quantities) if variant_quantities else {}
+    stock = _refresh_in_stock(db, {product_id for product_id, _, _ in rows})
+    _bump_counters(db, orders=-len(expired_ids), revenue=-sum(expired.values()))
     db.commit()
-    db.refresh(db_order)
-    return db_order
+    catalog_cache.update_stock(stock, variant_levels)
+    return len(expired_ids)
 
 # Wishlist CRUD operations
-def get_wishlist_items(db: Session, user_id: int, skip: int = 0, limit: int = 100):
-    return db.query(models.WishlistItem).filter(models.WishlistItem.user_id == user_id).offset(skip).limit(limit).all()
+def _wishlist_query(db: Session):
+    """Wishlist items with their product summary and primary image, in a single SELECT"""
+    primary = aliased(models.ProductImage)
+    first_primary_image = (
+        select(func.min(primary.id))
+        .where(primary.product_id == models.Product.id, primary.is_primary.is_(True))
+        .correlate(models.Product)
+        .scalar_subquery()
+    )
+    return (
+        db.query(models.WishlistItem)
+        .join(models.WishlistItem.product)
+        .outerjoin(models.ProductImage, models.ProductImage.id == first_primary_image)
+        .options(contains_eager(models.WishlistItem.product).contains_eager(models.Product.primary_image))
+    )
 
-def add_to_wishlist(db: Session, user_id: int, product_id: int):
-    # Check if already in wishlist
-    existing_item = db.query(models.WishlistItem).filter(
-        and_(models.WishlistItem.user_id == user_id, models.WishlistItem.product_id == product_id)
-    ).first()
-    
-    if existing_item:
-        return existing_item
-    
-    db_wishlist_item = models.WishlistItem(
-        user_id=user_id,
-        product_id=product_id
+def get_wishlist_items(db: Session, user_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = _wishlist_query(db).filter(models.WishlistItem.user_id == user_id)
+    return paginate(query, [models.WishlistItem.id], skip, limit, cursor)
+
+def get_wishlist_product_ids(db: Session, user_id: int) -> frozenset:
+    """Ids of the products on a user's wishlist, cached per user; db must be the primary"""
+    product_ids = wishlist_cache.get(user_id)
+    if product_ids is None:
+        # An add/remove that commits while this reads invalidates the user's
+        # generation, and the set it read is then not cached
+        generation = wishlist_cache.generation(user_id)
+        # Answered from the (user_id, product_id) index alone
+        product_ids = frozenset(db.execute(
+            select(models.WishlistItem.product_id).where(models.WishlistItem.user_id == user_id)
+        ).scalars())
+        wishlist_cache.set(user_id, product_ids, generation=generation)
+    return product_ids
+
+def add_to_wishlist_batch(db: Session, user_id: int, product_ids: List[int]):
+    """Add products to a wishlist, skipping ones already on it; returns their items, or None if a product is unknown"""
+    product_ids = list(dict.fromkeys(product_ids))
+    found = db.execute(select(models.Product.id).where(models.Product.id.in_(product_ids))).scalars().all()
+    if len(found) != len(product_ids):
+        return None
+    insert_ignoring_conflicts(
+        db, models.WishlistItem,
+        [{"user_id": user_id, "product_id": product_id} for product_id in product_ids],
+        ["user_id", "product_id"]
     )
-    db.add(db_wishlist_item)
     db.commit()
-    db.refresh(db_wishlist_item)
-    return db_wishlist_item
+    wishlist_cache.invalidate(user_id)
+    return _wishlist_query(db).populate_existing().filter(
+        models.WishlistItem.user_id == user_id, models.WishlistItem.product_id.in_(product_ids)
+    ).order_by(models.WishlistItem.id).all()
 
-def remove_from_wishlist(db: Session, user_id: int, product_id: int):
-    db_wishlist_item = db.query(models.WishlistItem).filter(
-        and_(models.WishlistItem.user_id == user_id, models.WishlistItem.product_id == product_id)
-    ).first()
-    
-    if not db_wishlist_item:
-        return False
-    
-    db.delete(db_wishlist_item)
+def add_to_wishlist(db: Session, user_id: int, product_id: int):
+    items = add_to_wishlist_batch(db, user_id, [product_id])
+    return items[0] if items else None
+
+def remove_from_wishlist_batch(db: Session, user_id: int, product_ids: List[int]) -> int:
+    """Remove products from a wishlist; returns how many were on it"""
+    result = db.execute(delete(models.WishlistItem).where(
+        models.WishlistItem.user_id == user_id, models.WishlistItem.product_id.in_(product_ids)
+    ))
     db.commit()
-    return True
+    wishlist_cache.invalidate(user_id)
+    return result.rowcount
+
+def remove_from_wishlist(db: Session, user_id: int, product_id: int):
+    return remove_from_wishlist_batch(db, user_id, [product_id]) > 0
 
 # Account Application CRUD operations
 def generate_account_number(db: Session) -> str:
@@ -264,9 +831,42 @@ def generate_account_number(db: Session) -> str:
         if not existing:
             return account_number
 
-def create_account_application(db: Session, application: schemas.AccountApplicationCreate):
+def get_stored_blob(db: Session, sha256: str):
+    return db.get(models.StoredBlob, sha256)
+
+def add_blob_reference(db: Session, document):
+    """Count one more reference to a stored document, registering the blob on first use (no commit)"""
+    upsert(db, models.StoredBlob, [{
+        "sha256": document.sha256,
+        "path": document.path,
+        "content_type": document.content_type,
+        "size": document.size,
+        "ref_count": 1
+    }], ["sha256"], lambda excluded: {"ref_count": models.StoredBlob.ref_count + 1})
+
+def get_blobs_pending_preview(db: Session):
+    return db.query(models.StoredBlob).filter(models.StoredBlob.preview_status == "pending").all()
+
+def set_blob_previews(db: Session, sha256: str, status: str, thumbnail_path: Optional[str], preview_path: Optional[str]):
+    db_blob = get_stored_blob(db, sha256)
+    if not db_blob:
+        return None
+    db_blob.preview_status = status
+    db_blob.thumbnail_path = thumbnail_path
+    db_blob.preview_path = preview_path
+    db.commit()
+    return db_blob
+
+def create_account_application(
+    db: Session,
+    application: schemas.AccountApplicationCreate,
+    hashed_password: Optional[str] = None,
+    documents: Optional[dict] = None
+):
+    """Create an application; documents maps a DOCUMENT_FIELDS prefix to its stored upload"""
     # Hash the password
-    hashed_password = get_password_hash(application.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(application.password)
     
     # Generate unique account number
     account_number = generate_account_number(db)
@@ -277,20 +877,29 @@ def create_account_application(db: Session, application: schemas.AccountApplicat
     application_data['hashed_password'] = hashed_password
     application_data['account_number'] = account_number
     
+    for prefix, document in (documents or {}).items():
+        application_data[f"{prefix}_file_path"] = document.path
+        application_data[f"{prefix}_sha256"] = document.sha256
+        add_blob_reference(db, document)
+    
     db_application = models.AccountApplication(**application_data)
     db.add(db_application)
     db.commit()
-    db.refresh(db_application)
-    return db_application
+    return _application_query(db).populate_existing().filter(models.AccountApplication.id == db_application.id).first()
+
+def _application_query(db: Session):
+    return db.query(models.AccountApplication).options(
+        *(eager_load(getattr(models.AccountApplication, f"{prefix}_document")) for prefix in DOCUMENT_FIELDS)
+    )
 
 def get_account_application(db: Session, application_id: int):
-    return db.query(models.AccountApplication).filter(models.AccountApplication.id == application_id).first()
+    return _application_query(db).filter(models.AccountApplication.id == application_id).first()
 
-def get_account_applications(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None):
-    query = db.query(models.AccountApplication)
+def get_account_applications(db: Session, skip: int = 0, limit: int = 100, status: Optional[str] = None, cursor: Optional[str] = None):
+    query = _application_query(db)
     if status:
         query = query.filter(models.AccountApplication.status == status)
-    return query.offset(skip).limit(limit).all()
+    return paginate(query, [models.AccountApplication.id], skip, limit, cursor)
 
 def update_account_application_status(db: Session, application_id: int, status: str, reviewed_by: int, review_notes: Optional[str] = None):
     db_application = db.query(models.AccountApplication).filter(models.AccountApplication.id == application_id).first()
@@ -305,7 +914,111 @@ def update_account_application_status(db: Session, application_id: int, status:
     
     db.commit()
     db.refresh(db_application)
+    principal_cache.invalidate(db_application.email)
     return db_application
 
 def get_account_application_by_email(db: Session, email: str):
     return db.query(models.AccountApplication).filter(models.AccountApplication.email == email).first()
+
+# Idempotency key operations
+def claim_idempotency_key(db: Session, key: str, request_hash: str, claim_token: str, lease_seconds: float):
+    """Claim key for a new request; returns None if claimed, else the record already holding it"""
+    while True:
+        now = datetime.utcnow()
+        # A lapsed record (finished long ago, or a claim its crashed worker stopped renewing) can be reused
+        db.execute(delete(models.IdempotencyKey).where(
+            models.IdempotencyKey.key == key, models.IdempotencyKey.expires_at <= now
+        ))
+        insert_ignoring_conflicts(db, models.IdempotencyKey, [{
+            "key": key, "request_hash": request_hash, "claim_token": claim_token,
+            "expires_at": now + timedelta(seconds=lease_seconds)
+        }], ["key"])
+        db.commit()
+        existing = db.query(models.IdempotencyKey).populate_existing().filter(models.IdempotencyKey.key == key).first()
+        if existing is not None and existing.claim_token == claim_token and existing.status_code is None:
+            return None
+        # None: the holder failed and released the key in between, so try again
+        if existing is not None:
+            return existing
+
+def _claimed_by(key: str, claim_token: str):
+    """Filter for a key that is still in progress under this claim"""
+    return (
+        models.IdempotencyKey.key == key,
+        models.IdempotencyKey.claim_token == claim_token,
+        models.IdempotencyKey.status_code.is_(None),
+    )
+
+def renew_idempotency_key(db: Session, key: str, claim_token: str, lease_seconds: float) -> bool:
+    """Extend a running request's claim; False if it has been lost"""
+    result = db.execute(
+        update(models.IdempotencyKey)
+        .where(*_claimed_by(key, claim_token))
+        .values(expires_at=datetime.utcnow() + timedelta(seconds=lease_seconds))
+    )
+    db.commit()
+    return result.rowcount > 0
+
+def complete_idempotency_key(db: Session, key: str, claim_token: str, status_code: int, response_body: str,
+                             ttl_seconds: float) -> bool:
+    """Store the response of a claimed request; False if the claim was lost"""
+    result = db.execute(
+        update(models.IdempotencyKey)
+        .where(*_claimed_by(key, claim_token))
+        .values(status_code=status_code, response_body=response_body,
+                expires_at=datetime.utcnow() + timedelta(seconds=ttl_seconds))
+    )
+    db.commit()
+    return result.rowcount > 0
+
+def release_idempotency_key(db: Session, key: str, claim_token: str):
+    db.execute(delete(models.IdempotencyKey).where(*_claimed_by(key, claim_token)))
+    db.commit()
+
+def purge_expired_idempotency_keys(db: Session) -> int:
+    result = db.execute(delete(models.IdempotencyKey).where(models.IdempotencyKey.expires_at <= datetime.utcnow()))
+    db.commit()
+    return result.rowcount
+
+# Dashboard statistics
+def _bump_counters(db: Session, **deltas):
+    """Add to the named counters as part of the caller's transaction"""
+    # One random shard per transaction: concurrent writers only wait on each
+    # other when they happen to draw the same one
+    shard = random.randrange(max(settings.STAT_COUNTER_SHARDS, 1))
+    rows = [{"name": name, "shard": shard, "value": delta} for name, delta in deltas.items() if delta]
+    if not rows:
+        return
+    upsert(db, models.StatCounter, rows, ["name", "shard"], lambda excluded: {
+        "value": models.StatCounter.value + excluded.value, "updated_at": func.now()
+    })
+
+def get_stats(db: Session) -> Dict[str, float]:
+    values = dict(db.execute(
+        select(models.StatCounter.name, func.sum(models.StatCounter.value)).group_by(models.StatCounter.name)
+    ).all())
+    return {name: values.get(name, 0) for name in STAT_COUNTERS}
+
+def reconcile_stat_counters(db: Session) -> Dict[str, float]:
+    """Recompute every counter from the tables; returns the drift that was corrected"""
+    live_orders = models.Order.status != "expired"
+    sources = {
+        "users": select(func.count(models.User.id)),
+        "products": select(func.count(models.Product.id)),
+        "orders": select(func.count(models.Order.id)).where(live_orders),
+        "revenue": select(func.coalesce(func.sum(models.Order.total_amount), 0)).where(live_orders),
+    }
+    before = get_stats(db)
+    for name, source in sources.items():
+        # Count and store in one statement, so no write lands between the two;
+        # shard 0 takes up the difference between the count and the other shards
+        other_shards = (
+            select(func.coalesce(func.sum(models.StatCounter.value), 0))
+            .where(models.StatCounter.name == name, models.StatCounter.shard != 0)
+        )
+        upsert(db, models.StatCounter, [{
+            "name": name, "shard": 0, "value": source.scalar_subquery() - other_shards.scalar_subquery()
+        }], ["name", "shard"], lambda excluded: {"value": excluded.value, "updated_at": func.now()})
+    after = get_stats(db)
+    db.commit()
+    return {name: after[name] - before[name] for name in STAT_COUNTERS if after[name] != before[name]}
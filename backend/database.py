@@ -1,13 +1,203 @@
-from sqlalchemy import create_engine
+import asyncio
+import hashlib
+import re
+import sqlite3
+import threading
+import time
+from fastapi import Request
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
+# Async drivers used when DATABASE_URL names a sync one
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "mysql": "mysql+aiomysql",
+}
+
+def async_database_url(url: str) -> str:
+    url = make_url(url)
+    if url.drivername in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.drivername])
+    return url.render_as_string(hide_password=False)
+
+# Order matters: busy_timeout first so switching journal mode waits out other writers
+SQLITE_PRAGMAS = (
+    ("busy_timeout", settings.SQLITE_BUSY_TIMEOUT_MS),
+    ("journal_mode", settings.SQLITE_JOURNAL_MODE),
+    ("synchronous", settings.SQLITE_SYNCHRONOUS),
+    ("cache_size", settings.SQLITE_CACHE_SIZE),
+    ("mmap_size", settings.SQLITE_MMAP_SIZE),
+    ("temp_store", settings.SQLITE_TEMP_STORE),
 )
+
+def sqlite_pragmas():
+    """(name, value) pairs from SQLITE_PRAGMAS that are set, validated for use in a PRAGMA statement"""
+    pragmas = []
+    for name, value in SQLITE_PRAGMAS:
+        value = value.strip()
+        if not value:
+            continue
+        if not re.fullmatch(r"-?\w+", value):
+            raise ValueError(f"Invalid value for SQLite pragma {name}: {value!r}")
+        pragmas.append((name, value))
+    return pragmas
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in sqlite_pragmas():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+def engine_options(url: str) -> dict:
+    options = {}
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite":
+        options["connect_args"] = {"check_same_thread": False}
+        if url.database in (None, "", ":memory:"):
+            # In-memory databases use a single shared connection, not a sized pool
+            return options
+    options.update(
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+    )
+    return options
+
+def _set_query_only(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA query_only=ON")
+    finally:
+        cursor.close()
+
+def configure_engine(sync_engine, read_only: bool = False):
+    """Apply the SQLite performance profile to each connection the engine opens"""
+    if sync_engine.dialect.name == "sqlite":
+        event.listen(sync_engine, "connect", _set_sqlite_pragmas)
+        if read_only:
+            event.listen(sync_engine, "connect", _set_query_only)
+    return sync_engine
+
+def describe_connection(connection) -> dict:
+    """Effective connection settings, read back from the database"""
+    engine = connection.engine
+    description = {"url": engine.url.render_as_string(hide_password=True), "pool": type(engine.pool).__name__}
+    if isinstance(engine.pool, QueuePool):
+        description["pool_size"] = engine.pool.size()
+        description["max_overflow"] = settings.DB_MAX_OVERFLOW
+    if engine.dialect.name == "sqlite":
+        for name, _ in SQLITE_PRAGMAS:
+            description[name] = connection.exec_driver_sql(f"PRAGMA {name}").scalar()
+    return description
+
+engine = configure_engine(create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL)))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+ASYNC_URL = settings.ASYNC_DATABASE_URL or async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(ASYNC_URL, **engine_options(ASYNC_URL))
+configure_engine(async_engine.sync_engine)
+# Objects stay loaded after commit so handlers can serialize them without
+# issuing lazy loads outside the session's greenlet
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Read replica: GET handlers read from it unless the client wrote recently
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.READ_REPLICA_URL:
+    REPLICA_ASYNC_URL = async_database_url(settings.READ_REPLICA_URL)
+    replica_engine = create_async_engine(REPLICA_ASYNC_URL, **engine_options(REPLICA_ASYNC_URL))
+    configure_engine(replica_engine.sync_engine, read_only=True)
+    ReplicaSessionLocal = async_sessionmaker(
+        replica_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+
+class RecentWrites:
+    """Clients that wrote within the read-your-writes window, keyed by client_key()"""
+
+    def __init__(self, window_seconds: float):
+        self.window_seconds = window_seconds
+        self._written_at = {}
+        self._lock = threading.Lock()
+        self.primary_reads = 0
+        self.replica_reads = 0
+
+    def mark(self, key: str):
+        now = time.monotonic()
+        with self._lock:
+            self._written_at[key] = now
+            if len(self._written_at) > 10000:
+                self._written_at = {
+                    k: at for k, at in self._written_at.items() if now - at < self.window_seconds
+                }
+
+    def wrote_recently(self, key: str) -> bool:
+        written_at = self._written_at.get(key)
+        return written_at is not None and time.monotonic() - written_at < self.window_seconds
+
+    def stats(self) -> dict:
+        return {
+            "replica": settings.READ_REPLICA_URL != "",
+            "window_seconds": self.window_seconds,
+            "recent_writers": sum(1 for key in list(self._written_at) if self.wrote_recently(key)),
+            "primary_reads": self.primary_reads,
+            "replica_reads": self.replica_reads,
+            "replica_synced_at": replica_synced_at,
+        }
+
+recent_writes = RecentWrites(settings.READ_YOUR_WRITES_SECONDS)
+
+def client_key(request: Request) -> str:
+    """Identifies the client for read-your-writes: its bearer token, else its address"""
+    credential = request.headers.get("authorization") or (request.client.host if request.client else "")
+    return hashlib.sha1(credential.encode()).hexdigest()
+
+# SQLite replica stand-in
+replica_synced_at = None
+
+def sqlite_replica_paths():
+    """(primary, replica) file paths when both databases are SQLite files, else None"""
+    if not settings.READ_REPLICA_URL:
+        return None
+    primary, replica = make_url(settings.DATABASE_URL), make_url(settings.READ_REPLICA_URL)
+    if primary.get_backend_name() != "sqlite" or replica.get_backend_name() != "sqlite":
+        return None
+    if primary.database in (None, "", ":memory:") or replica.database in (None, "", ":memory:"):
+        return None
+    return primary.database, replica.database
+
+def sync_sqlite_replica():
+    """Copy the primary SQLite database into the replica file with the online backup API"""
+    global replica_synced_at
+    primary_path, replica_path = sqlite_replica_paths()
+    busy_timeout = int(settings.SQLITE_BUSY_TIMEOUT_MS or 5000) / 1000
+    source = sqlite3.connect(primary_path, timeout=busy_timeout)
+    target = sqlite3.connect(replica_path, timeout=busy_timeout)
+    try:
+        source.backup(target)
+    finally:
+        target.close()
+        source.close()
+    replica_synced_at = time.time()
+
+async def run_sqlite_replica_sync(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(sync_sqlite_replica)
+        except sqlite3.Error as e:
+            print(f"Replica sync failed: {e}")
+
 Base = declarative_base()
 
 def get_db():
@@ -16,3 +206,29 @@ def get_db():
         yield db
     finally:
         db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+async def get_read_db(request: Request):
+    """Session for read-only handlers: the replica, or the primary inside the client's read-your-writes window"""
+    if ReplicaSessionLocal is None or recent_writes.wrote_recently(client_key(request)):
+        recent_writes.primary_reads += 1
+        session_factory = AsyncSessionLocal
+    else:
+        recent_writes.replica_reads += 1
+        session_factory = ReplicaSessionLocal
+    async with session_factory() as db:
+        yield db
+
+async def get_write_db(request: Request):
+    """Primary session for handlers that write; opens the client's read-your-writes window"""
+    key = client_key(request)
+    recent_writes.mark(key)
+    try:
+        async with AsyncSessionLocal() as db:
+            yield db
+    finally:
+        # Restart the window once the write is done, however long it took
+        recent_writes.mark(key)
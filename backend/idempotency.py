@@ -0,0 +1,192 @@
+"""Idempotency-Key support for non-idempotent POST endpoints.
+
+The first request with a given key runs the endpoint and stores its response;
+repeats within IDEMPOTENCY_TTL_SECONDS get the stored response back without
+running it again. Duplicates that arrive while the first is still running wait
+for it: in the same process on a shared future, across processes by polling
+the idempotency_keys row that the first request claimed.
+"""
+import asyncio
+import functools
+import hashlib
+import json
+import logging
+import time
+import uuid
+from fastapi import HTTPException, Request, Response, UploadFile
+import async_crud
+from cache import TTLCache
+from config import settings
+from database import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+POLL_SECONDS = 0.1
+PURGE_INTERVAL_SECONDS = 300
+
+async def request_fingerprint(request: Request) -> str:
+    """Hash of what the request asks for, to detect a key reused for a different request"""
+    digest = hashlib.sha256(f"{request.method} {request.url.path}\n".encode())
+    if request.headers.get("content-type", "").startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        # Already parsed (and cached) by FastAPI; uploads are identified by name and size
+        form = await request.form()
+        fields = sorted(
+            (name, [value.filename, value.size] if isinstance(value, UploadFile) else value)
+            for name, value in form.multi_items()
+        )
+        digest.update(json.dumps(fields).encode())
+    else:
+        digest.update(await request.body())
+    return digest.hexdigest()
+
+class IdempotencyStore:
+    def __init__(self, ttl: float, cache_size: int, wait_seconds: float, lease_seconds: float):
+        self.ttl = ttl
+        self.wait_seconds = wait_seconds
+        self.lease_seconds = lease_seconds
+        # Completed responses: key -> (fingerprint, status code, body)
+        self.cache = TTLCache(cache_size, ttl)
+        self._in_flight = {}
+        self._last_purge = 0.0
+        self.replayed = 0
+        self.coalesced = 0
+
+    def _replay(self, fingerprint: str, record) -> Response:
+        stored_fingerprint, status_code, body = record
+        if stored_fingerprint != fingerprint:
+            raise HTTPException(status_code=422, detail=f"{HEADER} was already used for a different request")
+        self.replayed += 1
+        return Response(
+            content=body, status_code=status_code, media_type="application/json",
+            headers={"Idempotent-Replayed": "true"}
+        )
+
+    async def _claim(self, key: str, fingerprint: str, claim_token: str):
+        """Claim key in the database; returns a stored (fingerprint, status, body) record if it is already done"""
+        deadline = time.monotonic() + self.wait_seconds
+        async with AsyncSessionLocal() as db:
+            if time.monotonic() - self._last_purge > PURGE_INTERVAL_SECONDS:
+                self._last_purge = time.monotonic()
+                await async_crud.purge_expired_idempotency_keys(db)
+            while True:
+                existing = await async_crud.claim_idempotency_key(db, key, fingerprint, claim_token, self.lease_seconds)
+                if existing is None:
+                    return None
+                if existing.status_code is not None:
+                    return existing.request_hash, existing.status_code, existing.response_body.encode()
+                if existing.request_hash != fingerprint:
+                    raise HTTPException(status_code=422, detail=f"{HEADER} was already used for a different request")
+                # Running in another worker process
+                if time.monotonic() > deadline:
+                    raise HTTPException(status_code=409, detail="A request with this Idempotency-Key is still in progress")
+                await asyncio.sleep(POLL_SECONDS)
+
+    async def run(self, key: str, fingerprint: str, call, response_model) -> Response:
+        record = self.cache.get(key)
+        if record is not None:
+            return self._replay(fingerprint, record)
+        leader = self._in_flight.get(key)
+        if leader is not None:
+            self.coalesced += 1
+            record = await asyncio.shield(leader)
+            return self._replay(fingerprint, record)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        claim_token = uuid.uuid4().hex
+        try:
+            record = await self._claim(key, fingerprint, claim_token)
+            if record is not None:
+                self.cache.set(key, record)
+                future.set_result(record)
+                return self._replay(fingerprint, record)
+            renewal = asyncio.create_task(self._renew(key, claim_token))
+            try:
+                result = await call()
+            except BaseException:
+                await self._release(key, claim_token)
+                raise
+            finally:
+                renewal.cancel()
+            body = response_model.model_validate(result).model_dump_json().encode()
+            record = (fingerprint, 200, body)
+            await self._complete(key, claim_token, body)
+            self.cache.set(key, record)
+            future.set_result(record)
+            return Response(content=body, media_type="application/json")
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Mark the exception retrieved when no duplicate was waiting for it
+                future.exception()
+            raise
+        finally:
+            self._in_flight.pop(key, None)
+
+    async def _renew(self, key: str, claim_token: str):
+        """Keep extending the claim while the request runs, however long it takes"""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with AsyncSessionLocal() as db:
+                    if not await async_crud.renew_idempotency_key(db, key, claim_token, self.lease_seconds):
+                        logger.warning("Lost the claim on idempotency key %s", key)
+                        return
+            except Exception as e:
+                logger.warning("Renewing idempotency key %s failed: %s", key, e)
+
+    async def _complete(self, key: str, claim_token: str, body: bytes):
+        async with AsyncSessionLocal() as db:
+            if not await async_crud.complete_idempotency_key(db, key, claim_token, 200, body.decode(), self.ttl):
+                logger.warning("Response for idempotency key %s not stored: the claim was lost", key)
+
+    async def _release(self, key: str, claim_token: str):
+        # Failed requests are not stored, so a retry runs again
+        async with AsyncSessionLocal() as db:
+            await async_crud.release_idempotency_key(db, key, claim_token)
+
+    def metrics(self) -> dict:
+        return {
+            "in_flight": len(self._in_flight),
+            "replayed": self.replayed,
+            "coalesced": self.coalesced,
+            "cache": self.cache.stats(),
+        }
+
+idempotency_store = IdempotencyStore(
+    settings.IDEMPOTENCY_TTL_SECONDS,
+    settings.IDEMPOTENCY_CACHE_SIZE,
+    settings.IDEMPOTENCY_WAIT_SECONDS,
+    settings.IDEMPOTENCY_LEASE_SECONDS
+)
+
+def _principal_scope(user) -> str:
+    if user is None:
+        return "-"
+    # Users and approved applications are numbered separately
+    return f"{'application' if getattr(user, 'is_application', False) else 'user'}-{user.id}"
+
+def idempotent(scope: str, response_model):
+    """Honour an Idempotency-Key header on the decorated endpoint.
+
+    The endpoint must take `request: Request`; keys are scoped to the endpoint
+    and, when it has a `current_user`, to that user or approved application.
+    """
+    def decorator(endpoint):
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            request: Request = kwargs["request"]
+            key = request.headers.get(HEADER)
+            if key is None:
+                return await endpoint(*args, **kwargs)
+            if not key or len(key) > MAX_KEY_LENGTH:
+                raise HTTPException(status_code=400, detail=f"{HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+            scoped_key = f"{scope}:{_principal_scope(kwargs.get('current_user'))}:{key}"
+            fingerprint = await request_fingerprint(request)
+            return await idempotency_store.run(
+                scoped_key, fingerprint, lambda: endpoint(*args, **kwargs), response_model
+            )
+        return wrapper
+    return decorator
@@ -0,0 +1,243 @@
+"""Product image originals and their resized derivatives.
+
+Originals are uploaded by admins into a content-addressed store. Width/format
+variants are rendered on first request in a worker pool and kept in an
+on-disk cache that evicts the least recently used files beyond a byte budget.
+"""
+import asyncio
+import os
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from PIL import Image, ImageOps, features
+import media_urls
+import storage
+from cache import TTLCache
+from config import settings
+from workers import WorkerPool
+
+# Derivative formats: URL suffix -> (Pillow format, media type, save options)
+IMAGE_FORMATS = {
+    "avif": ("AVIF", "image/avif", {"quality": 60}),
+    "webp": ("WEBP", "image/webp", {"quality": 80}),
+    "jpeg": ("JPEG", "image/jpeg", {"quality": 82, "progressive": True, "optimize": True}),
+}
+
+SHA256_PATTERN = re.compile(r"[0-9a-f]{64}")
+
+# A variant that failed to render is not attempted again for this long
+RENDER_FAILURE_TTL_SECONDS = 300
+
+class RenderFailed(ValueError):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+def check_image(path: str):
+    """Raise unless Pillow can decode the whole file (magic bytes alone pass truncated files)"""
+    with Image.open(path) as image:
+        image.verify()
+    # verify() leaves the image unusable and skips pixel data; decode it too
+    with Image.open(path) as image:
+        image.load()
+
+def available_formats():
+    """Derivative formats this Pillow build can encode, best compression first"""
+    return [name for name, (pillow_format, _, _) in IMAGE_FORMATS.items()
+            if pillow_format == "JPEG" or features.check(pillow_format.lower())]
+
+def render_derivative(source: str, target: str, width: int, format_name: str) -> int:
+    """Resize source to width (never upscaling) and write it as format_name; returns the file size"""
+    pillow_format, _, options = IMAGE_FORMATS[format_name]
+    with Image.open(source) as image:
+        # JPEG originals decode straight to a reduced scale when much larger than needed
+        image.draft("RGB", (width, max(1, image.height * width // image.width)))
+        image = ImageOps.exif_transpose(image)
+        if image.width > width:
+            image = image.resize((width, max(1, round(image.height * width / image.width))), Image.LANCZOS)
+        if pillow_format == "JPEG" or image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGB" if pillow_format == "JPEG" or image.mode not in ("LA", "P") else "RGBA")
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_target = f"{target}.tmp"
+        image.save(tmp_target, pillow_format, **options)
+    os.replace(tmp_target, target)
+    return os.path.getsize(target)
+
+class DiskLRUCache:
+    """Byte-budgeted LRU index over files in a directory.
+
+    The index is rebuilt from modification times at startup and hits touch the
+    file, so recency survives restarts. Each worker process keeps its own index;
+    a file evicted by another process is simply rendered again.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._loaded = False
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self):
+        files = []
+        if self.root.exists():
+            for path in self.root.rglob("*"):
+                if path.is_file() and not path.name.endswith(".tmp"):
+                    stat = path.stat()
+                    files.append((stat.st_mtime, str(path), stat.st_size))
+        for _, path, size in sorted(files):
+            self._entries[path] = size
+            self._total_bytes += size
+        self._loaded = True
+
+    def _over_budget(self) -> list:
+        """Drop least recently used entries until within budget; returns their paths"""
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            path, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            evicted.append(path)
+        return evicted
+
+    def _unlink(self, paths: list):
+        for path in paths:
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+
+    def get(self, path: Path) -> bool:
+        """Whether path is cached; a hit marks it most recently used"""
+        key = str(path)
+        evicted = []
+        with self._lock:
+            if not self._loaded:
+                # The budget may have shrunk since the files were written
+                self._load()
+                evicted = self._over_budget()
+            if key in self._entries and os.path.exists(key):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                hit = True
+            else:
+                self._total_bytes -= self._entries.pop(key, 0)
+                self.misses += 1
+                hit = False
+        self._unlink(evicted)
+        if hit:
+            os.utime(key)
+        return hit
+
+    def add(self, path: Path, size: int):
+        key = str(path)
+        with self._lock:
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            evicted = self._over_budget()
+        self._unlink(evicted)
+
+    def stats(self) -> dict:
+        return {
+            "files": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+class ProductImageService:
+    def __init__(self, root: Path, max_workers: int, cache_bytes: int, max_upload_bytes: int):
+        self.root = Path(root)
+        self.max_workers = max_workers
+        self.originals = storage.BlobStore(self.root, {
+            content_type: max_upload_bytes for content_type in ("image/jpeg", "image/png", "image/webp")
+        })
+        self.cache = DiskLRUCache(self.root / "derivatives", cache_bytes)
+        self.formats = available_formats()
+        self.pool = WorkerPool(max_workers)
+        self._rendering = {}
+        self._failed = TTLCache(1024, RENDER_FAILURE_TTL_SECONDS)
+
+    async def save(self, upload) -> storage.StoredDocument:
+        """Store an original, rejecting files that do not decode with 422"""
+        stored = await self.originals.save(upload)
+        try:
+            await asyncio.to_thread(check_image, str(self.originals.full_path(stored.path)))
+        except Exception:
+            if stored.created:
+                self.originals.delete(stored.path)
+            raise storage.UploadRejected(422, f"{upload.filename or 'upload'} is not a readable image")
+        return stored
+
+    def original_path(self, sha256: str) -> Optional[Path]:
+        if not SHA256_PATTERN.fullmatch(sha256):
+            return None
+        for content_type in self.originals.size_limits:
+            path = self.originals.full_path(self.originals.relative_path(sha256, content_type))
+            if path.exists():
+                return path
+        return None
+
+    def derivative_path(self, sha256: str, width: int, format_name: str) -> Path:
+        return self.root / "derivatives" / sha256[:2] / f"{sha256}-{width}.{format_name}"
+
+    async def derivative(self, sha256: str, width: int, format_name: str) -> Optional[Path]:
+        """Path of the variant, rendering it on first request; None if the original is unknown.
+
+        Raises RenderFailed when the original cannot be rendered; the failure
+        is remembered for RENDER_FAILURE_TTL_SECONDS instead of re-rendering.
+        """
+        if not SHA256_PATTERN.fullmatch(sha256):
+            return None
+        target = self.derivative_path(sha256, width, format_name)
+        if self.cache.get(target):
+            return target
+        key = (sha256, width, format_name)
+        if self._failed.get(key):
+            raise RenderFailed(422, "Image could not be rendered")
+        source = self.original_path(sha256)
+        if source is None:
+            return None
+        # Concurrent requests for the same variant share one render
+        render = self._rendering.get(key)
+        try:
+            if render is None:
+                render = self.pool.submit(render_derivative, str(source), str(target), width, format_name)
+                self._rendering[key] = render
+                try:
+                    size = await render
+                except Exception as e:
+                    print(f"Rendering {target.name} failed: {e}")
+                    self._failed.set(key, True)
+                    raise
+                finally:
+                    self._rendering.pop(key, None)
+                self.cache.add(target, size)
+            else:
+                await render
+        except Exception as e:
+            raise RenderFailed(422, "Image could not be rendered") from e
+        return target
+
+    def metrics(self) -> dict:
+        return {"workers": self.max_workers, "formats": self.formats, "cache": self.cache.stats()}
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+product_images = ProductImageService(
+    Path("media"),
+    settings.PRODUCT_IMAGE_WORKERS,
+    settings.PRODUCT_IMAGE_CACHE_BYTES,
+    settings.PRODUCT_IMAGE_MAX_BYTES
+)
+media_urls.srcset_formats = product_images.formats
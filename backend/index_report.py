@@ -0,0 +1,129 @@
+"""Index usage report for the crud read queries.
+
+Runs each read path in crud with representative arguments, captures the SQL
+it emits and prints SQLite's EXPLAIN QUERY PLAN for every statement, flagging
+full table scans and temporary sort b-trees. Run it against a migrated, seeded
+database after changing a query or an index:
+
+    python index_report.py [--output index_report.md]
+"""
+import argparse
+import re
+import sys
+from contextlib import contextmanager
+from sqlalchemy import event
+from database import engine, SessionLocal
+import models
+import schemas
+import crud
+import search
+
+# Plan steps that read a whole table; virtual (FTS) tables and subquery results are
+# fine, and an unfiltered listing walking products in rowid order is expected
+FULL_SCAN = re.compile(r"^SCAN (\w+)(?! VIRTUAL TABLE)(?!.*USING (COVERING )?INDEX)")
+TEMP_SORT = re.compile(r"USE TEMP B-TREE")
+
+@contextmanager
+def capture_statements():
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+def _sample(db, column, default):
+    value = db.query(column).filter(column.isnot(None)).limit(1).scalar()
+    return value if value is not None else default
+
+def crud_reads(db):
+    """(label, call) for each crud read path, with arguments taken from the data"""
+    product = db.query(models.Product).first()
+    category = _sample(db, models.Product.category, "rings")
+    material = _sample(db, models.Product.material, "gold")
+    user_id = _sample(db, models.User.id, 1)
+    filters = schemas.ProductFilters(category=[category], price_min=100, price_max=2500)
+    return [
+        ("get_user_by_email", lambda: crud.get_user_by_email(db, "admin@sjewelry.com")),
+        ("get_product", lambda: crud.get_product(db, product.id if product else 1)),
+        ("get_products", lambda: crud.get_products(db, limit=20)),
+        (f"get_products(category={category})", lambda: crud.get_products(db, category=category, limit=20)),
+        (f"get_products(material={material})", lambda: crud.get_products(db, material=material, limit=20)),
+        ("get_products(in_stock, new_arrivals)", lambda: crud.get_products(db, in_stock=True, new_arrivals=True, limit=20)),
+        ("search_products(query)", lambda: crud.search_products(db, "diamond")),
+        (f"search_products(category={category}, price 100-2500)", lambda: crud.search_products(db, None, filters)),
+        ("search_products(metal_tone)", lambda: crud.search_products(
+            db, None, schemas.ProductFilters(metal_tone=["white_gold"])
+        )),
+        ("get_product_facets", lambda: crud.get_product_facets(db, None, None)),
+        ("get_product_facets(category)", lambda: crud.get_product_facets(db, None, filters)),
+        ("get_user_orders", lambda: crud.get_user_orders(db, user_id)),
+        ("get_wishlist_items", lambda: crud.get_wishlist_items(db, user_id)),
+        ("get_account_applications(status=pending)", lambda: crud.get_account_applications(db, status="pending")),
+    ]
+
+def explain(connection, statement, parameters):
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return [row[3] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+def build_report() -> str:
+    if engine.dialect.name != "sqlite":
+        raise SystemExit("index_report.py only understands SQLite query plans")
+    # Text search only takes the FTS path once the index is known to exist
+    search.init_search_index(engine)
+
+    db = SessionLocal()
+    sections, summary = [], []
+    try:
+        for label, call in crud_reads(db):
+            db.expunge_all()  # make every run load its relationships again
+            with capture_statements() as statements:
+                call()
+            connection = db.connection().connection.dbapi_connection
+            scans, sorts = set(), 0
+            section = [f"## {label}", ""]
+            for statement, parameters in statements:
+                plan = explain(connection, statement, parameters)
+                for step in plan:
+                    match = FULL_SCAN.match(step.strip())
+                    if match:
+                        scans.add(match.group(1))
+                    if TEMP_SORT.search(step):
+                        sorts += 1
+                section += ["```sql", " ".join(statement.split()), "```"]
+                section += [f"    {step}" for step in plan] + [""]
+            sections.append("\n".join(section))
+            summary.append(f"| {label} | {len(statements)} | {', '.join(sorted(scans)) or '-'} | {sorts} |")
+    finally:
+        db.close()
+
+    header = [
+        "# Index usage report",
+        "",
+        "| Query | Statements | Full scans | Temp sorts |",
+        "| --- | --- | --- | --- |",
+    ]
+    return "\n".join(header + summary) + "\n\n" + "\n".join(sections)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", help="write the report to this file instead of stdout")
+    args = parser.parse_args(argv)
+    report = build_report()
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(report)
+        print(f"Wrote {args.output}")
+    else:
+        sys.stdout.write(report)
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,62 @@
-from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form
+from fastapi import FastAPI, Depends, HTTPException, status, UploadFile, File, Form, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.staticfiles import StaticFiles
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from typing import List, Optional
+import asyncio
 import json
+import mimetypes
 import os
-import shutil
 from pathlib import Path
 
-from database import engine, get_db
+from database import engine, async_engine, describe_connection, get_async_db, get_read_db, get_write_db, SessionLocal, AsyncSessionLocal
+import database
 import models
 import schemas
 import crud
+import async_crud
 import auth
+import passwords
+import pagination
+import conditional
+import responses
+import catalog_io
+import storage
+import images
+import media_urls
+from images import product_images
+from previews import preview_generator
+from idempotency import idempotent, idempotency_store
+from compression import CompressionMiddleware, CompressionStats
+from cache import principal_cache, wishlist_cache
+from catalog import catalog_cache
+import search
+import migrate
 from config import settings
 
-# Create database tables
-models.Base.metadata.create_all(bind=engine)
+# Create or upgrade database tables
+if settings.AUTO_MIGRATE:
+    migrate.upgrade_database(engine)
+search.init_search_index(engine)
 
-app = FastAPI(title="SJ Jewelry API", version="1.0.0")
+app = FastAPI(
+    title="SJ Jewelry API",
+    version="1.0.0",
+    default_response_class=responses.default_response_class()
+)
+
+# Negotiated brotli/gzip compression with per-route byte counts
+compression_stats = CompressionStats()
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MIN_SIZE,
+    gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+    brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    stats=compression_stats
+)
 
 # CORS middleware
 app.add_middleware(
@@ -29,29 +65,26 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified", "Idempotent-Replayed"],
 )
 
-# Mount static files for serving uploaded documents
-app.mount("/documents", StaticFiles(directory="documents"), name="documents")
+@app.exception_handler(pagination.InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: pagination.InvalidCursor):
+    return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content={"detail": str(exc)})
+
+def set_next_cursor(response: Response, page: pagination.Page):
+    """Expose the keyset cursor of a list page without changing the list body"""
+    if page.next_cursor:
+        response.headers["X-Next-Cursor"] = page.next_cursor
 
 # File upload utility functions
-def save_uploaded_file(file: UploadFile, folder: str, account_number: str) -> str:
-    """Save uploaded file and return the file path"""
-    # Create directory if it doesn't exist
-    upload_dir = Path(f"documents/uploads/{folder}")
-    upload_dir.mkdir(parents=True, exist_ok=True)
-    
-    # Generate unique filename
-    file_extension = Path(file.filename).suffix if file.filename else ""
-    filename = f"{account_number}_{file.filename}"
-    file_path = upload_dir / filename
-    
-    # Save file
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-    
-    # Return relative path for database storage
-    return f"uploads/{folder}/{filename}"
+# Account application documents, stored once per distinct content
+document_store = storage.BlobStore(Path("documents"), {
+    "application/pdf": settings.DOCUMENT_MAX_PDF_BYTES,
+    "image/jpeg": settings.DOCUMENT_MAX_IMAGE_BYTES,
+    "image/png": settings.DOCUMENT_MAX_IMAGE_BYTES,
+    "image/webp": settings.DOCUMENT_MAX_IMAGE_BYTES,
+})
 
 def delete_file(file_path: str) -> bool:
     """Delete a file from the documents directory"""
@@ -69,9 +102,9 @@ def delete_file(file_path: str) -> bool:
 @app.post("/token", response_model=schemas.Token)
 async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -85,20 +118,61 @@ async def login_for_access_token(
     return {"access_token": access_token, "token_type": "bearer"}
 
 @app.post("/register", response_model=schemas.User)
-async def register_user(user: schemas.UserCreate, db: Session = Depends(get_db)):
-    db_user = crud.get_user_by_email(db, email=user.email)
+async def register_user(user: schemas.UserCreate, db: AsyncSession = Depends(get_write_db)):
+    db_user = await async_crud.get_user_by_email(db, email=user.email)
     if db_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
         )
-    return crud.create_user(db=db, user=user)
+    hashed_password = await passwords.hash_password(user.password)
+    return await async_crud.create_user(db=db, user=user, hashed_password=hashed_password)
 
 @app.get("/me", response_model=schemas.User)
 async def read_users_me(current_user: models.User = Depends(auth.get_current_active_user)):
     return current_user
 
 # Product endpoints
+_catalog_load_lock = asyncio.Lock()
+
+async def cached_catalog(db: AsyncSession):
+    """Return the loaded catalog cache, or None when reads must go to the database"""
+    if not catalog_cache.enabled:
+        return None
+    if catalog_cache.needs_load():
+        async with _catalog_load_lock:
+            # Load from the primary: a lagging replica could miss writes this
+            # worker has already patched into the cache
+            async with AsyncSessionLocal() as primary:
+                if catalog_cache.needs_load() and not await async_crud.load_catalog(primary):
+                    return None
+    return catalog_cache
+
+async def _catalog_validators(request: Request, response: Response, db: AsyncSession, cache_control: str, cached: bool = True):
+    # Validators derive from the catalog data, not from this worker's state,
+    # so they agree across workers and survive reloads that change nothing.
+    # Routes answered from the database (and every route with the cache off)
+    # use a database fingerprint of the products table instead: the cache only
+    # learns of other workers' writes at its next reload
+    catalog = await cached_catalog(db) if cached else None
+    if catalog is not None:
+        token, last_modified = catalog.validators()
+    else:
+        token, last_modified = await async_crud.get_catalog_fingerprint(db)
+    etag = conditional.make_etag(token, request.url.path, request.url.query)
+    validators = conditional.Validators(request, etag, last_modified, cache_control)
+    validators.apply(response)
+    return validators
+
+async def catalog_validators(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    return await _catalog_validators(request, response, db, settings.CATALOG_CACHE_CONTROL)
+
+async def search_validators(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    return await _catalog_validators(request, response, db, settings.CATALOG_CACHE_CONTROL, cached=False)
+
+async def product_validators(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    return await _catalog_validators(request, response, db, settings.PRODUCT_CACHE_CONTROL)
+
 @app.get("/products", response_model=List[schemas.Product])
 async def get_products(
     skip: int = 0,
@@ -111,19 +185,27 @@ async def get_products(
     new_arrivals: Optional[bool] = None,
     certified: Optional[bool] = None,
     customizable: Optional[bool] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    response: Response = None,
+    validators: conditional.Validators = Depends(catalog_validators),
+    db: AsyncSession = Depends(get_read_db)
 ):
-    products = crud.get_products(
-        db, skip=skip, limit=limit,
+    if validators.not_modified:
+        return validators.not_modified_response()
+    filters = dict(
         category=category, material=material, gemstone=gemstone,
         occasion=occasion, in_stock=in_stock, new_arrivals=new_arrivals,
         certified=certified, customizable=customizable
     )
+    catalog = await cached_catalog(db)
+    if catalog is not None:
+        products = catalog.list_products(skip=skip, limit=limit, cursor=cursor, **filters)
+    else:
+        products = await async_crud.get_products(db, skip=skip, limit=limit, cursor=cursor, **filters)
+    set_next_cursor(response, products)
     return products
 
-@app.get("/products/search", response_model=List[schemas.Product])
-async def search_products(
-    query: Optional[str] = None,
+def product_search_filters(
     category: Optional[str] = None,
     material: Optional[str] = None,
     gemstone: Optional[str] = None,
@@ -137,45 +219,32 @@ async def search_products(
     in_stock: Optional[bool] = None,
     new_arrivals: Optional[bool] = None,
     certified: Optional[bool] = None,
-    customizable: Optional[bool] = None,
-    page: int = 1,
-    limit: int = 20,
-    db: Session = Depends(get_db)
-):
+    customizable: Optional[bool] = None
+) -> schemas.ProductFilters:
+    """Parse the storefront's search query parameters into ProductFilters"""
     # Handle multiple values for filters (comma-separated)
     categories = category.split(',') if category else []
     materials = material.split(',') if material else []
     gemstones = gemstone.split(',') if gemstone else []
     occasions = occasion.split(',') if occasion else []
-    metalTypes = metalType.split(',') if metalType else []
-    metalTonesList = metalTones.split(',') if metalTones else []
+    metalTypes = metalType.lower().split(',') if metalType else []
+    metalTonesList = metalTones.lower().split(',') if metalTones else []
     diamondWeights = diamondWeight.split(',') if diamondWeight else []
     priceRanges = priceRange.split(',') if priceRange else []
     
     # Process price ranges
-    if priceRanges:
-        for price_range in priceRanges:
-            if price_range == "under-100":
-                price_min = 0
-                price_max = 100
-            elif price_range == "100-500":
-                price_min = 100
-                price_max = 500
-            elif price_range == "500-1000":
-                price_min = 500
-                price_max = 1000
-            elif price_range == "1000-2500":
-                price_min = 1000
-                price_max = 2500
-            elif price_range == "over-2500":
-                price_min = 2500
-                price_max = None
+    for price_range in priceRanges:
+        if price_range in crud.PRICE_RANGES:
+            price_min, price_max = crud.PRICE_RANGES[price_range]
     
-    filters = schemas.ProductFilters(
+    return schemas.ProductFilters(
         category=categories if categories else None,
         material=materials if materials else None,
         gemstone=gemstones if gemstones else None,
         occasion=occasions if occasions else None,
+        metal_type=metalTypes if metalTypes else None,
+        metal_tone=metalTonesList if metalTonesList else None,
+        diamond_weight=diamondWeights if diamondWeights else None,
         price_min=price_min,
         price_max=price_max,
         in_stock=in_stock,
@@ -183,42 +252,83 @@ async def search_products(
         certified=certified,
         customizable=customizable
     )
-    
+
+@app.get("/products/search", response_model=List[schemas.Product])
+async def search_products(
+    query: Optional[str] = None,
+    filters: schemas.ProductFilters = Depends(product_search_filters),
+    page: int = 1,
+    limit: int = 20,
+    cursor: Optional[str] = None,
+    response: Response = None,
+    validators: conditional.Validators = Depends(search_validators),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if validators.not_modified:
+        return validators.not_modified_response()
     skip = (page - 1) * limit
-    products = crud.search_products(db, query=query, filters=filters, skip=skip, limit=limit)
-    
-    # Apply additional filters that aren't in the schema
-    filtered_products = products
-    
-    # Filter by metal type if specified
-    if metalTypes:
-        filtered_products = [p for p in filtered_products if any(mt.lower() in p.material.lower() for mt in metalTypes)]
-    
-    # Filter by metal tones if specified
-    if metalTonesList:
-        filtered_products = [p for p in filtered_products if any(mt.lower() in p.material.lower() for mt in metalTonesList)]
-    
-    # Filter by diamond weight if specified
-    if diamondWeights:
-        filtered_products = [p for p in filtered_products if any(dw in str(p.specifications or {}) for dw in diamondWeights)]
-    
-    return filtered_products
+    products = await async_crud.search_products(db, query=query, filters=filters, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, products)
+    return products
+
+@app.get("/products/facets", response_model=schemas.ProductFacets)
+async def get_product_facets(
+    query: Optional[str] = None,
+    filters: schemas.ProductFilters = Depends(product_search_filters),
+    validators: conditional.Validators = Depends(search_validators),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if validators.not_modified:
+        return validators.not_modified_response()
+    return await async_crud.get_product_facets(db, query=query, filters=filters)
+
+@app.get("/catalog/version")
+async def get_catalog_version():
+    return {"version": catalog_cache.version, "tag": catalog_cache.content_tag}
 
 @app.get("/products/{product_id}", response_model=schemas.Product)
-async def get_product(product_id: int, db: Session = Depends(get_db)):
-    product = crud.get_product(db, product_id=product_id)
+async def get_product(
+    product_id: int,
+    validators: conditional.Validators = Depends(product_validators),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if validators.not_modified:
+        return validators.not_modified_response()
+    catalog = await cached_catalog(db)
+    if catalog is not None:
+        product = catalog.get(product_id)
+    else:
+        product = await async_crud.get_product(db, product_id=product_id)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
 
 @app.get("/products/category/{category}", response_model=List[schemas.Product])
-async def get_products_by_category(category: str, db: Session = Depends(get_db)):
-    products = crud.get_products(db, category=category)
+async def get_products_by_category(
+    category: str,
+    validators: conditional.Validators = Depends(catalog_validators),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if validators.not_modified:
+        return validators.not_modified_response()
+    catalog = await cached_catalog(db)
+    if catalog is not None:
+        return catalog.list_products(category=category)
+    products = await async_crud.get_products(db, category=category)
     return products
 
 @app.get("/products/material/{material}", response_model=List[schemas.Product])
-async def get_products_by_material(material: str, db: Session = Depends(get_db)):
-    products = crud.get_products(db, material=material)
+async def get_products_by_material(
+    material: str,
+    validators: conditional.Validators = Depends(catalog_validators),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if validators.not_modified:
+        return validators.not_modified_response()
+    catalog = await cached_catalog(db)
+    if catalog is not None:
+        return catalog.list_products(material=material)
+    products = await async_crud.get_products(db, material=material)
     return products
 
 # Admin endpoints for product management
@@ -226,18 +336,18 @@ async def get_products_by_material(material: str, db: Session = Depends(get_db))
 async def create_product(
     product: schemas.ProductCreate,
     current_user: models.User = Depends(auth.get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    return crud.create_product(db=db, product=product)
+    return await async_crud.create_product(db=db, product=product)
 
 @app.put("/admin/products/{product_id}", response_model=schemas.Product)
 async def update_product(
     product_id: int,
     product_update: schemas.ProductUpdate,
     current_user: models.User = Depends(auth.get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    product = crud.update_product(db=db, product_id=product_id, product_update=product_update)
+    product = await async_crud.update_product(db=db, product_id=product_id, product_update=product_update)
     if product is None:
         raise HTTPException(status_code=404, detail="Product not found")
     return product
@@ -246,70 +356,282 @@ async def update_product(
 async def delete_product(
     product_id: int,
     current_user: models.User = Depends(auth.get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    success = crud.delete_product(db=db, product_id=product_id)
-    if not success:
+    deleted = await async_crud.delete_product(db=db, product_id=product_id)
+    if deleted is None:
         raise HTTPException(status_code=404, detail="Product not found")
+    if deleted is False:
+        raise HTTPException(status_code=409, detail="Product has orders; set its stock to 0 instead")
     return {"message": "Product deleted successfully"}
 
+@app.post("/admin/products/{product_id}/images", response_model=schemas.Product)
+async def upload_product_image(
+    product_id: int,
+    file: UploadFile = File(...),
+    alt: Optional[str] = Form(None),
+    is_primary: bool = Form(False),
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Store an original product image; resized variants are rendered when first requested"""
+    if await async_crud.get_product(db, product_id) is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    try:
+        stored = await product_images.save(file)
+    except storage.UploadRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    image = schemas.ProductImageCreate(
+        src=media_urls.image_url(stored.sha256), alt=alt, is_primary=is_primary, sha256=stored.sha256
+    )
+    return await async_crud.add_product_image(db=db, product_id=product_id, image=image)
+
+@app.post("/admin/products/{product_id}/variants", response_model=schemas.Product)
+async def create_product_variant(
+    product_id: int,
+    variant: schemas.ProductVariantCreate,
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    if await async_crud.get_product_variant_by_sku(db, variant.sku):
+        raise HTTPException(status_code=400, detail="SKU already exists")
+    product = await async_crud.create_product_variant(db=db, product_id=product_id, variant=variant)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return product
+
+@app.put("/admin/products/{product_id}/variants/{variant_id}", response_model=schemas.Product)
+async def update_product_variant(
+    product_id: int,
+    variant_id: int,
+    variant_update: schemas.ProductVariantUpdate,
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    if variant_update.sku is not None:
+        existing = await async_crud.get_product_variant_by_sku(db, variant_update.sku)
+        if existing and existing.id != variant_id:
+            raise HTTPException(status_code=400, detail="SKU already exists")
+    product = await async_crud.update_product_variant(
+        db=db, product_id=product_id, variant_id=variant_id, variant_update=variant_update
+    )
+    if product is None:
+        raise HTTPException(status_code=404, detail="Variant not found")
+    return product
+
+@app.delete("/admin/products/{product_id}/variants/{variant_id}", response_model=schemas.Product)
+async def delete_product_variant(
+    product_id: int,
+    variant_id: int,
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    product = await async_crud.delete_product_variant(db=db, product_id=product_id, variant_id=variant_id)
+    if product is None:
+        raise HTTPException(status_code=404, detail="Variant not found")
+    if product is False:
+        raise HTTPException(status_code=409, detail="Variant has orders; set its stock to 0 instead")
+    return product
+
+# Import errors reported back per request; later failures are only counted
+MAX_REPORTED_IMPORT_ERRORS = 100
+
+@app.post("/admin/products/import", response_model=schemas.ProductImportResult)
+async def import_products(
+    request: Request,
+    format: Optional[str] = None,
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Create or replace products (matched by name) from a streamed NDJSON or CSV body"""
+    format = format or catalog_io.format_for_content_type(request.headers.get("content-type"))
+    if format not in catalog_io.FORMATS:
+        raise HTTPException(status_code=415, detail="Send application/x-ndjson or text/csv, or pass ?format=ndjson|csv")
+
+    result = schemas.ProductImportResult()
+    batch = []
+
+    async def flush():
+        counts = await async_crud.bulk_upsert_products(db, batch)
+        result.created += counts["created"]
+        result.updated += counts["updated"]
+        result.batches += 1
+        batch.clear()
+
+    async for line, product, error in catalog_io.iter_products(request.stream(), format):
+        if error is not None:
+            result.failed += 1
+            if len(result.errors) < MAX_REPORTED_IMPORT_ERRORS:
+                result.errors.append(schemas.ProductImportError(line=line, error=error))
+            continue
+        batch.append(product)
+        if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+            await flush()
+    if batch:
+        await flush()
+    return result
+
+@app.get("/admin/products/export")
+async def export_products(
+    format: str = "ndjson",
+    current_user: models.User = Depends(auth.get_current_admin_user)
+):
+    """Stream the whole catalog as NDJSON or CSV in a format the import endpoint accepts"""
+    if format not in catalog_io.FORMATS:
+        raise HTTPException(status_code=400, detail="format must be ndjson or csv")
+
+    def stream():
+        # Own session: request dependencies are closed before the body is sent
+        db = SessionLocal()
+        try:
+            products = crud.iter_products_for_export(db, settings.BULK_EXPORT_BATCH_SIZE)
+            yield from catalog_io.encode_products(products, format)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type=catalog_io.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="products.{format}"'}
+    )
+
 # Order endpoints
 @app.post("/orders", response_model=schemas.Order)
+@idempotent("orders", schemas.Order)
 async def create_order(
+    request: Request,
     order: schemas.OrderCreate,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    return crud.create_order(db=db, order=order, user_id=current_user.id)
+    try:
+        return await async_crud.create_order(db=db, order=order, user_id=current_user.id)
+    except crud.OrderRejected as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
 
 @app.get("/orders", response_model=List[schemas.Order])
 async def get_user_orders(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    return crud.get_user_orders(db=db, user_id=current_user.id)
+    orders = await async_crud.get_user_orders(db=db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, orders)
+    return orders
 
 @app.get("/orders/{order_id}", response_model=schemas.Order)
 async def get_order(
     order_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    order = crud.get_order(db=db, order_id=order_id)
+    order = await async_crud.get_order(db=db, order_id=order_id)
     if order is None or order.user_id != current_user.id:
         raise HTTPException(status_code=404, detail="Order not found")
     return order
 
+@app.post("/orders/{order_id}/confirm", response_model=schemas.Order)
+async def confirm_order(
+    order_id: int,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    """Complete checkout: the order keeps its reserved stock instead of expiring"""
+    order = await async_crud.confirm_order(db=db, order_id=order_id, user_id=current_user.id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    if order is False:
+        raise HTTPException(status_code=409, detail="Order is no longer pending")
+    return order
+
 # Wishlist endpoints
 @app.get("/wishlist", response_model=List[schemas.WishlistItem])
 async def get_wishlist(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    response: Response = None,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    items = await async_crud.get_wishlist_items(db=db, user_id=current_user.id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, items)
+    return items
+
+@app.get("/wishlist/contains", response_model=schemas.WishlistMembership)
+async def get_wishlist_membership(
+    ids: Optional[str] = None,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    # The primary, not the replica: a lagging replica would fill the shared
+    # per-user cache with a set that misses another device's recent write
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Which of the comma-separated product ids are wishlisted; all of them when ids is omitted"""
+    try:
+        requested = [int(product_id) for product_id in ids.split(',')] if ids else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated product ids")
+    wishlisted = await async_crud.get_wishlist_product_ids(db=db, user_id=current_user.id)
+    if requested is None:
+        return {"product_ids": sorted(wishlisted)}
+    return {"product_ids": [product_id for product_id in dict.fromkeys(requested) if product_id in wishlisted]}
+
+@app.post("/wishlist/batch", response_model=List[schemas.WishlistItem])
+async def add_to_wishlist_batch(
+    batch: schemas.WishlistBatch,
+    current_user: models.User = Depends(auth.get_current_active_user),
+    db: AsyncSession = Depends(get_write_db)
+):
+    items = await async_crud.add_to_wishlist_batch(db=db, user_id=current_user.id, product_ids=batch.product_ids)
+    if items is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return items
+
+@app.delete("/wishlist/batch")
+async def remove_from_wishlist_batch(
+    batch: schemas.WishlistBatch,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    return crud.get_wishlist_items(db=db, user_id=current_user.id)
+    removed = await async_crud.remove_from_wishlist_batch(db=db, user_id=current_user.id, product_ids=batch.product_ids)
+    return {"removed": removed}
 
 @app.post("/wishlist/{product_id}", response_model=schemas.WishlistItem)
 async def add_to_wishlist(
     product_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    return crud.add_to_wishlist(db=db, user_id=current_user.id, product_id=product_id)
+    item = await async_crud.add_to_wishlist(db=db, user_id=current_user.id, product_id=product_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Product not found")
+    return item
 
 @app.delete("/wishlist/{product_id}")
 async def remove_from_wishlist(
     product_id: int,
     current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
-    success = crud.remove_from_wishlist(db=db, user_id=current_user.id, product_id=product_id)
+    success = await async_crud.remove_from_wishlist(db=db, user_id=current_user.id, product_id=product_id)
     if not success:
         raise HTTPException(status_code=404, detail="Wishlist item not found")
     return {"message": "Item removed from wishlist"}
 
 # Account Application endpoints
+async def _discard_new_documents(db: AsyncSession, documents: dict):
+    """Remove blobs this request added that no application references"""
+    for document in documents.values():
+        if document.created and not await async_crud.get_stored_blob(db, document.sha256):
+            document_store.delete(document.path)
+
 @app.post("/account-applications", response_model=schemas.AccountApplication)
+@idempotent("account-applications", schemas.AccountApplication)
 async def create_account_application(
+    request: Request,
     # Form data fields
     email: str = Form(...),
     password: str = Form(...),
@@ -364,10 +686,10 @@ async def create_account_application(
     driver_license_file: Optional[UploadFile] = File(None),
     sales_tax_permit_file: Optional[UploadFile] = File(None),
     lease_agreement_file: Optional[UploadFile] = File(None),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     # Check if email already exists in applications or users
-    existing_application = crud.get_account_application_by_email(db, email)
+    existing_application = await async_crud.get_account_application_by_email(db, email)
     if existing_application:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -375,7 +697,7 @@ async def create_account_application(
         )
     
     # Check if user already exists
-    existing_user = crud.get_user_by_email(db, email)
+    existing_user = await async_crud.get_user_by_email(db, email)
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -435,44 +757,40 @@ async def create_account_application(
         "partner_title": partner_title,
     }
     
-    # Create the application first to get the account number
-    application_schema = schemas.AccountApplicationCreate(**application_data)
-    db_application = crud.create_account_application(db=db, application=application_schema)
-    
-    # Handle file uploads
-    file_paths = {}
+    # Store the documents before creating the application, so an invalid
+    # upload is rejected without leaving a half-created application behind
+    uploads = {
+        "driver_license": driver_license_file,
+        "sales_tax_permit": sales_tax_permit_file,
+        "lease_agreement": lease_agreement_file,
+    }
+    documents = {}
     try:
-        if driver_license_file and driver_license_file.filename:
-            file_paths["driver_license_file_path"] = save_uploaded_file(
-                driver_license_file, "driver_licenses", db_application.account_number
-            )
-        
-        if sales_tax_permit_file and sales_tax_permit_file.filename:
-            file_paths["sales_tax_permit_file_path"] = save_uploaded_file(
-                sales_tax_permit_file, "sales_tax_permits", db_application.account_number
-            )
-        
-        if lease_agreement_file and lease_agreement_file.filename:
-            file_paths["lease_agreement_file_path"] = save_uploaded_file(
-                lease_agreement_file, "lease_agreements", db_application.account_number
-            )
-        
-        # Update the application with file paths
-        if file_paths:
-            for field, path in file_paths.items():
-                setattr(db_application, field, path)
-            db.commit()
-            db.refresh(db_application)
+        for prefix, upload in uploads.items():
+            if upload and upload.filename:
+                documents[prefix] = await document_store.save(upload)
+    except storage.UploadRejected as e:
+        await _discard_new_documents(db, documents)
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     
-    except Exception as e:
-        # If file upload fails, clean up the application
-        db.delete(db_application)
-        db.commit()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"File upload failed: {str(e)}"
+    try:
+        application_schema = schemas.AccountApplicationCreate(**application_data)
+        hashed_password = await passwords.hash_password(password)
+        db_application = await async_crud.create_account_application(
+            db=db, application=application_schema, hashed_password=hashed_password, documents=documents
         )
+    except Exception:
+        # The blob references roll back with the application insert (e.g. a
+        # concurrent application for the same email), leaving new files orphaned
+        await db.rollback()
+        await _discard_new_documents(db, documents)
+        raise
     
+    # Thumbnails and previews are rendered in the background after the response
+    for prefix in documents:
+        document = getattr(db_application, f"{prefix}_document")
+        if document is not None and document.preview_status == "pending":
+            preview_generator.schedule(document.sha256, document.path, document.content_type)
     return db_application
 
 @app.get("/account-applications", response_model=List[schemas.AccountApplication])
@@ -480,18 +798,22 @@ async def get_account_applications(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    response: Response = None,
     current_user: models.User = Depends(auth.get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    return crud.get_account_applications(db=db, skip=skip, limit=limit, status=status)
+    applications = await async_crud.get_account_applications(db=db, skip=skip, limit=limit, status=status, cursor=cursor)
+    set_next_cursor(response, applications)
+    return applications
 
 @app.get("/account-applications/{application_id}", response_model=schemas.AccountApplication)
 async def get_account_application(
     application_id: int,
     current_user: models.User = Depends(auth.get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
-    application = crud.get_account_application(db=db, application_id=application_id)
+    application = await async_crud.get_account_application(db=db, application_id=application_id)
     if application is None:
         raise HTTPException(status_code=404, detail="Account application not found")
     return application
@@ -501,7 +823,7 @@ async def update_application_status(
     application_id: int,
     status_update: dict,
     current_user: models.User = Depends(auth.get_current_admin_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_write_db)
 ):
     status = status_update.get("status")
     review_notes = status_update.get("review_notes")
@@ -512,7 +834,7 @@ async def update_application_status(
             detail="Invalid status. Must be one of: pending, approved, rejected, under_review"
         )
     
-    application = crud.update_account_application_status(
+    application = await async_crud.update_account_application_status(
         db=db, 
         application_id=application_id, 
         status=status, 
@@ -525,21 +847,200 @@ async def update_application_status(
     
     return {"message": f"Application status updated to {status}", "application": application}
 
+# Application documents and their previews, for admins only
+DOCUMENT_CACHE_CONTROL = "private, max-age=3600"
+
+@app.get("/admin/documents/{file_path:path}")
+async def get_document(
+    file_path: str,
+    request: Request,
+    current_user: models.User = Depends(auth.get_current_admin_user)
+):
+    """Serve a stored document; Range and If-Range are handled by FileResponse"""
+    path = await asyncio.to_thread(document_store.resolve, file_path)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    stat_result = await asyncio.to_thread(os.stat, path)
+    validators = conditional.Validators(
+        request,
+        conditional.make_etag(file_path, stat_result.st_mtime_ns, stat_result.st_size),
+        stat_result.st_mtime,
+        DOCUMENT_CACHE_CONTROL
+    )
+    if validators.not_modified:
+        return validators.not_modified_response()
+
+    media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+    if settings.DOCUMENT_SENDFILE_HEADER:
+        # The proxy sends the file with sendfile(2), ranges included
+        if settings.DOCUMENT_SENDFILE_HEADER.lower() == "x-accel-redirect":
+            target = settings.DOCUMENT_SENDFILE_PREFIX + path.relative_to(document_store.root.resolve()).as_posix()
+        else:
+            target = str(path)
+        return Response(
+            media_type=media_type,
+            headers={settings.DOCUMENT_SENDFILE_HEADER: target, **validators.headers}
+        )
+    # Streamed in chunks, or via the ASGI pathsend extension where the server supports it
+    return FileResponse(
+        path,
+        media_type=media_type,
+        stat_result=stat_result,
+        headers=validators.headers,
+        filename=path.name,
+        content_disposition_type="inline"
+    )
+
+# Product image media; URLs embed the content hash, so responses never change
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@app.get("/media/images/{sha256}")
+async def get_product_image_original(sha256: str):
+    path = product_images.original_path(sha256)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(path, headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL})
+
+@app.get("/media/images/{sha256}/{width}.{format}")
+async def get_product_image_variant(sha256: str, width: int, format: str):
+    if width not in media_urls.IMAGE_WIDTHS or format not in product_images.formats:
+        raise HTTPException(status_code=404, detail="Image variant not found")
+    try:
+        path = await product_images.derivative(sha256, width, format)
+    except images.RenderFailed as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+    return FileResponse(
+        path,
+        media_type=images.IMAGE_FORMATS[format][1],
+        headers={"Cache-Control": IMMUTABLE_CACHE_CONTROL}
+    )
+
+# Dashboard
+@app.get("/admin/stats", response_model=schemas.DashboardStats)
+async def get_dashboard_stats(
+    current_user: models.User = Depends(auth.get_current_admin_user),
+    db: AsyncSession = Depends(get_read_db)
+):
+    """Totals from the maintained counters rather than COUNT/SUM over the tables"""
+    stats = await async_crud.get_stats(db)
+    return {
+        "total_products": stats["products"],
+        "total_users": stats["users"],
+        "total_orders": stats["orders"],
+        "total_revenue": round(stats["revenue"], 2),
+    }
+
+# Operational metrics
+@app.get("/admin/metrics/password-hashing")
+async def get_password_hashing_metrics(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return passwords.password_hasher.metrics()
+
+@app.get("/admin/metrics/compression")
+async def get_compression_metrics(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return compression_stats.snapshot()
+
+@app.get("/admin/metrics/previews")
+async def get_preview_metrics(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return preview_generator.metrics()
+
+@app.get("/admin/metrics/images")
+async def get_image_metrics(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return product_images.metrics()
+
+@app.get("/admin/metrics/idempotency")
+async def get_idempotency_metrics(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return idempotency_store.metrics()
+
+@app.get("/admin/metrics/database")
+async def get_database_metrics(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return database.recent_writes.stats()
+
+@app.get("/admin/metrics/caches")
+async def get_cache_metrics(current_user: models.User = Depends(auth.get_current_admin_user)):
+    return {
+        "principal": principal_cache.stats(),
+        "catalog": catalog_cache.stats(),
+        "wishlist": wishlist_cache.stats(),
+    }
+
+async def run_reservation_sweeper(interval: float):
+    """Release the stock of pending orders whose reservation has lapsed"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                expired = await async_crud.release_expired_reservations(db)
+            if expired:
+                print(f"Expired {expired} unconfirmed orders and restocked their items")
+        except Exception as e:
+            print(f"Reservation sweep failed: {e}")
+
+async def run_stats_reconciler(interval: float):
+    """Recompute the dashboard counters now and then, correcting any drift"""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with AsyncSessionLocal() as db:
+                drift = await async_crud.reconcile_stat_counters(db)
+            if drift:
+                print(f"Corrected dashboard counter drift: {drift}")
+        except Exception as e:
+            print(f"Stats reconciliation failed: {e}")
+
 # Initialize admin user
+replica_sync_task = None
+reservation_sweeper_task = None
+stats_reconciler_task = None
+
 @app.on_event("startup")
 async def startup_event():
-    db = next(get_db())
-    admin_user = crud.get_user_by_email(db, settings.ADMIN_EMAIL)
-    if not admin_user:
-        admin_user_data = schemas.UserCreate(
-            email=settings.ADMIN_EMAIL,
-            name="Admin",
-            password=settings.ADMIN_PASSWORD
+    async with async_engine.connect() as connection:
+        description = await connection.run_sync(describe_connection)
+    print("Database settings: " + ", ".join(f"{name}={value}" for name, value in description.items()))
+    async with AsyncSessionLocal() as db:
+        # Backfill normalized attributes for products written before they existed
+        if (await db.execute(select(models.ProductAttribute.id).limit(1))).first() is None:
+            await async_crud.rebuild_product_attributes(db)
+        admin_user = await async_crud.get_user_by_email(db, settings.ADMIN_EMAIL)
+        if not admin_user:
+            admin_user_data = schemas.UserCreate(
+                email=settings.ADMIN_EMAIL,
+                name="Admin",
+                password=settings.ADMIN_PASSWORD
+            )
+            hashed_password = await passwords.hash_password(settings.ADMIN_PASSWORD)
+            admin_user = await async_crud.create_user(db=db, user=admin_user_data, hashed_password=hashed_password)
+            admin_user.is_admin = True
+            await db.commit()
+            principal_cache.invalidate(admin_user.email)
+            print(f"Admin user created: {settings.ADMIN_EMAIL}")
+        # Resume previews interrupted by a restart
+        for document in await async_crud.get_blobs_pending_preview(db):
+            preview_generator.schedule(document.sha256, document.path, document.content_type)
+
+    global replica_sync_task, reservation_sweeper_task, stats_reconciler_task
+    if settings.RESERVATION_SWEEP_SECONDS > 0:
+        reservation_sweeper_task = asyncio.create_task(run_reservation_sweeper(settings.RESERVATION_SWEEP_SECONDS))
+    if settings.STATS_RECONCILE_SECONDS > 0:
+        stats_reconciler_task = asyncio.create_task(run_stats_reconciler(settings.STATS_RECONCILE_SECONDS))
+    if database.sqlite_replica_paths() and settings.SQLITE_REPLICA_SYNC_SECONDS > 0:
+        # Seed the replica before serving reads from it
+        await asyncio.to_thread(database.sync_sqlite_replica)
+        replica_sync_task = asyncio.create_task(
+            database.run_sqlite_replica_sync(settings.SQLITE_REPLICA_SYNC_SECONDS)
         )
-        admin_user = crud.create_user(db=db, user=admin_user_data)
-        admin_user.is_admin = True
-        db.commit()
-        print(f"Admin user created: {settings.ADMIN_EMAIL}")
+        print(f"Syncing SQLite read replica every {settings.SQLITE_REPLICA_SYNC_SECONDS}s")
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    for task in (replica_sync_task, reservation_sweeper_task, stats_reconciler_task):
+        if task is not None:
+            task.cancel()
+    passwords.password_hasher.shutdown()
+    preview_generator.shutdown()
+    product_images.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
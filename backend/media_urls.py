@@ -0,0 +1,24 @@
+"""Public URLs of product images and their resized variants.
+
+Free of Pillow and the image service, so schemas can render image URLs
+without loading either; the image service registers the formats it encodes.
+"""
+from typing import List, Optional
+from config import settings
+
+# Widths offered in srcset; requests for other widths are rejected
+IMAGE_WIDTHS = (200, 400, 800)
+
+# Variant formats listed in srcset, best compression first (see images.available_formats)
+srcset_formats: List[str] = ["jpeg"]
+
+def image_url(sha256: str, width: Optional[int] = None, format_name: Optional[str] = None) -> str:
+    """Public URL of an original (no width) or one of its variants"""
+    url = f"{settings.PUBLIC_BASE_URL}/media/images/{sha256}"
+    return url if width is None else f"{url}/{width}.{format_name}"
+
+def image_srcset(sha256: str) -> dict:
+    return {
+        format_name: ", ".join(f"{image_url(sha256, width, format_name)} {width}w" for width in IMAGE_WIDTHS)
+        for format_name in srcset_formats
+    }
@@ -0,0 +1,29 @@
+"""Bring the database schema up to date with the Alembic migration history"""
+from pathlib import Path
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+
+ALEMBIC_INI = Path(__file__).with_name("alembic.ini")
+
+def alembic_config(connection=None) -> Config:
+    config = Config(str(ALEMBIC_INI))
+    if connection is not None:
+        config.attributes["connection"] = connection
+    return config
+
+def _unversioned_revision(connection):
+    """Revision matching a database created by create_all before migrations existed"""
+    tables = set(inspect(connection).get_table_names())
+    if "alembic_version" in tables or "products" not in tables:
+        return None
+    return "0002" if "product_attributes" in tables else "0001"
+
+def upgrade_database(engine):
+    with engine.begin() as connection:
+        config = alembic_config(connection)
+        revision = _unversioned_revision(connection)
+        if revision:
+            print(f"Stamping existing database at migration {revision}")
+            command.stamp(config, revision)
+        command.upgrade(config, "head")
@@ -0,0 +1,44 @@
+"""shard stat counters
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 14:50:12.104731
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = '0013'
+down_revision = '0012'
+branch_labels = None
+depends_on = None
+
+SEED = (
+    "INSERT INTO stat_counters (name, {shard}value) "
+    "SELECT 'users', {zero}COUNT(*) FROM users "
+    "UNION ALL SELECT 'products', {zero}COUNT(*) FROM products "
+    "UNION ALL SELECT 'orders', {zero}COUNT(*) FROM orders WHERE status != 'expired' "
+    "UNION ALL SELECT 'revenue', {zero}COALESCE(SUM(total_amount), 0) FROM orders WHERE status != 'expired'"
+)
+
+def upgrade():
+    # The counters are derived data: rebuild the table with the shard in the
+    # primary key and seed shard 0 from the existing rows
+    op.drop_table('stat_counters')
+    op.create_table('stat_counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('shard', sa.Integer(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('name', 'shard')
+    )
+    op.execute(SEED.format(shard="shard, ", zero="0, "))
+
+def downgrade():
+    op.drop_table('stat_counters')
+    op.create_table('stat_counters',
+    sa.Column('name', sa.String(), nullable=False),
+    sa.Column('value', sa.Float(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('(CURRENT_TIMESTAMP)'), nullable=True),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.execute(SEED.format(shard="", zero=""))
@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Boolean, Text, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from database import Base
 
 class User(Base):
@@ -21,36 +21,57 @@ class User(Base):
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # Storefront filters pair a category or material with a price range
+        Index("ix_products_category_sale_price", "category", "sale_price"),
+        Index("ix_products_material_sale_price", "material", "sale_price"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, nullable=False)
+    name = Column(String, nullable=False, index=True)
     description = Column(Text)
     original_price = Column(Float, nullable=False)
-    sale_price = Column(Float, nullable=False)
+    sale_price = Column(Float, nullable=False, index=True)
     discount = Column(Float, default=0)
     category = Column(String)
     material = Column(String)
-    gemstone = Column(String)
-    occasion = Column(String)
+    gemstone = Column(String, index=True)
+    occasion = Column(String, index=True)
     in_stock = Column(Boolean, default=True)
+    # Units available; NULL leaves stock untracked and in_stock set by hand. When
+    # tracked (here or on variants), in_stock is derived from the quantities
+    stock_quantity = Column(Integer)
     new_arrivals = Column(Boolean, default=False)
     certified = Column(Boolean, default=False)
     customizable = Column(Boolean, default=False)
     specifications = Column(JSON)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Bumped by every UPDATE of the row, so catalog fingerprints tell apart
+    # edits that land within the same second of updated_at
+    revision = Column(Integer, nullable=False, default=0, server_default="0", onupdate=text("revision + 1"))
 
     # Relationships
     images = relationship("ProductImage", back_populates="product", cascade="all, delete-orphan")
+    attributes = relationship("ProductAttribute", back_populates="product", cascade="all, delete-orphan")
+    variants = relationship("ProductVariant", back_populates="product", cascade="all, delete-orphan",
+                            order_by="ProductVariant.id")
     order_items = relationship("OrderItem", back_populates="product")
     wishlist_items = relationship("WishlistItem", back_populates="product")
+    # Just the primary image, for product summaries (see crud._wishlist_query)
+    primary_image = relationship(
+        "ProductImage", uselist=False, viewonly=True,
+        primaryjoin="and_(ProductImage.product_id == Product.id, ProductImage.is_primary.is_(True))"
+    )
 
 class ProductImage(Base):
     __tablename__ = "product_images"
 
     id = Column(Integer, primary_key=True, index=True)
-    product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
     src = Column(String, nullable=False)
+    # Set for images uploaded to the media store; their variants are served by hash
+    sha256 = Column(String(64), index=True)
     alt = Column(String)
     is_primary = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -58,14 +79,44 @@ class ProductImage(Base):
     # Relationships
     product = relationship("Product", back_populates="images")
 
+class ProductAttribute(Base):
+    __tablename__ = "product_attributes"
+    __table_args__ = (
+        Index("ix_product_attributes_name_value", "name", "value", "product_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    name = Column(String, nullable=False)  # metal_type, metal_tone, diamond_weight
+    value = Column(String, nullable=False)
+
+    # Relationships
+    product = relationship("Product", back_populates="attributes")
+
+class ProductVariant(Base):
+    __tablename__ = "product_variants"
+
+    id = Column(Integer, primary_key=True, index=True)
+    product_id = Column(Integer, ForeignKey("products.id"), nullable=False, index=True)
+    sku = Column(String, nullable=False, unique=True)
+    options = Column(JSON)  # e.g. {"ring_size": "7"}
+    stock_quantity = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    # Relationships
+    product = relationship("Product", back_populates="variants")
+
 class Order(Base):
     __tablename__ = "orders"
 
     id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
     total_amount = Column(Float, nullable=False)
-    status = Column(String, default="pending")  # pending, confirmed, shipped, delivered, cancelled
+    status = Column(String, default="pending")  # pending, confirmed, shipped, delivered, cancelled, expired
     shipping_address = Column(JSON)
+    # Stock is held for a pending order until then; unconfirmed orders are expired and restocked
+    reserved_until = Column(DateTime, index=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
 
@@ -77,8 +128,9 @@ class OrderItem(Base):
     __tablename__ = "order_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False)
+    order_id = Column(Integer, ForeignKey("orders.id"), nullable=False, index=True)
     product_id = Column(Integer, ForeignKey("products.id"), nullable=False)
+    variant_id = Column(Integer, ForeignKey("product_variants.id"))
     quantity = Column(Integer, nullable=False)
     price = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -89,6 +141,10 @@ class OrderItem(Base):
 
 class WishlistItem(Base):
     __tablename__ = "wishlist_items"
+    __table_args__ = (
+        # One row per product and user; adds insert with ON CONFLICT DO NOTHING
+        Index("ix_wishlist_items_user_id_product_id", "user_id", "product_id", unique=True),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
@@ -181,18 +237,67 @@ class AccountApplication(Base):
     partner_print_name = Column(String)
     partner_title = Column(String)
     
-    # Document Uploads (file paths)
+    # Document Uploads (file paths, and the content hash of the stored blob)
     driver_license_file_path = Column(String)
     sales_tax_permit_file_path = Column(String)
     lease_agreement_file_path = Column(String)
+    driver_license_sha256 = Column(String(64), index=True)
+    sales_tax_permit_sha256 = Column(String(64), index=True)
+    lease_agreement_sha256 = Column(String(64), index=True)
     
     # Application Status
-    status = Column(String, default="pending")  # pending, approved, rejected, under_review
+    status = Column(String, default="pending", index=True)  # pending, approved, rejected, under_review
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     reviewed_by = Column(Integer, ForeignKey("users.id"))
     reviewed_at = Column(DateTime(timezone=True))
     review_notes = Column(Text)
+
+    # Relationships: the stored blob behind each document, with its previews
+    driver_license_document = relationship(
+        "StoredBlob", primaryjoin="foreign(AccountApplication.driver_license_sha256) == StoredBlob.sha256", viewonly=True
+    )
+    sales_tax_permit_document = relationship(
+        "StoredBlob", primaryjoin="foreign(AccountApplication.sales_tax_permit_sha256) == StoredBlob.sha256", viewonly=True
+    )
+    lease_agreement_document = relationship(
+        "StoredBlob", primaryjoin="foreign(AccountApplication.lease_agreement_sha256) == StoredBlob.sha256", viewonly=True
+    )
     
     # Relationships
     reviewer = relationship("User", foreign_keys=[reviewed_by])
+
+class StoredBlob(Base):
+    __tablename__ = "stored_blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)  # relative to the documents directory
+    content_type = Column(String, nullable=False)
+    size = Column(Integer, nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)
+    preview_status = Column(String, nullable=False, default="pending")  # pending, ready, unsupported, failed
+    thumbnail_path = Column(String)
+    preview_path = Column(String)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class IdempotencyKey(Base):
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)  # <endpoint>:<user id or ->:<client key>
+    request_hash = Column(String(64), nullable=False)
+    # Random per claim, so only the request holding the key can renew or complete it
+    claim_token = Column(String(32))
+    status_code = Column(Integer)  # NULL while the first request is still running
+    response_body = Column(Text)
+    expires_at = Column(DateTime, nullable=False, index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class StatCounter(Base):
+    __tablename__ = "stat_counters"
+
+    # users, products, orders, revenue (see crud.STAT_COUNTERS); each is the
+    # sum of its shard rows, picked at random by writers
+    name = Column(String, primary_key=True)
+    shard = Column(Integer, primary_key=True, default=0)
+    value = Column(Float, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,60 @@
+import base64
+import bisect
+import json
+from typing import Any, List, Optional
+from sqlalchemy import tuple_
+
+class InvalidCursor(ValueError):
+    pass
+
+class Page(list):
+    """A list of results that also carries the cursor for the following page"""
+
+    def __init__(self, items=(), next_cursor: Optional[str] = None):
+        super().__init__(items)
+        self.next_cursor = next_cursor
+
+def encode_cursor(key: List[Any]) -> str:
+    raw = json.dumps(key, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, key_length: int) -> List[Any]:
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except ValueError:
+        raise InvalidCursor("Malformed pagination cursor")
+    if not isinstance(key, list) or len(key) != key_length:
+        raise InvalidCursor("Pagination cursor does not match this listing")
+    # Listings are keyed by ids and ranks; anything else would fail to compare
+    if not all(isinstance(value, (int, float)) and not isinstance(value, bool) for value in key):
+        raise InvalidCursor("Pagination cursor does not match this listing")
+    return key
+
+def paginate(query, key_columns, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+    """Fetch one page ordered by key_columns.
+
+    With a cursor the page starts after the encoded key (keyset pagination) and
+    `skip` is ignored; otherwise OFFSET/LIMIT is used as before. Either way a
+    full page carries the cursor of its last row.
+    """
+    query = query.order_by(*key_columns).add_columns(*key_columns)
+    if cursor:
+        key = decode_cursor(cursor, len(key_columns))
+        query = query.filter(tuple_(*key_columns) > tuple_(*key))
+    else:
+        query = query.offset(skip)
+    rows = query.limit(limit).all()
+    items = [row[0] for row in rows]
+    next_cursor = encode_cursor(list(rows[-1][1:])) if rows and len(rows) == limit else None
+    return Page(items, next_cursor)
+
+def paginate_list(items: List[Any], key, key_length: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+    """paginate() for a list already sorted by `key`, which maps an item to its key tuple"""
+    if cursor:
+        after = tuple(decode_cursor(cursor, key_length))
+        items = items[bisect.bisect_right(items, after, key=key):]
+    else:
+        items = items[skip:]
+    items = items[:limit]
+    next_cursor = encode_cursor(list(key(items[-1]))) if items and len(items) == limit else None
+    return Page(items, next_cursor)
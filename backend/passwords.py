@@ -0,0 +1,82 @@
+import threading
+import time
+from passlib.context import CryptContext
+from config import settings
+from workers import WorkerPool
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Worker functions run in the pool processes; they return their own run time
+# so the caller can split latency into queue wait and bcrypt work.
+def _hash_in_worker(password: str):
+    started = time.perf_counter()
+    return pwd_context.hash(password), time.perf_counter() - started
+
+def _verify_in_worker(plain_password: str, hashed_password: str):
+    started = time.perf_counter()
+    return pwd_context.verify(plain_password, hashed_password), time.perf_counter() - started
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded process pool so it never blocks the event loop"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self.pool = WorkerPool(max_workers)
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._max_in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    async def _run(self, function, *args):
+        with self._lock:
+            self._in_flight += 1
+            self._max_in_flight = max(self._max_in_flight, self._in_flight)
+        started = time.perf_counter()
+        try:
+            result, run_seconds = await self.pool.submit(function, *args)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+        with self._lock:
+            self._completed += 1
+            self._run_seconds += run_seconds
+            self._wait_seconds += max(time.perf_counter() - started - run_seconds, 0.0)
+        return result
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash_in_worker, password)
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(_verify_in_worker, plain_password, hashed_password)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            completed = self._completed or 1
+            return {
+                "workers": self.max_workers,
+                "in_flight": self._in_flight,
+                "queue_depth": max(self._in_flight - self.max_workers, 0),
+                "max_in_flight": self._max_in_flight,
+                "completed": self._completed,
+                "failed": self._failed,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2),
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 2),
+            }
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+password_hasher = PasswordHasher(settings.PASSWORD_HASH_WORKERS)
+
+async def hash_password(password: str) -> str:
+    return await password_hasher.hash(password)
+
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    return await password_hasher.verify(plain_password, hashed_password)
@@ -0,0 +1,121 @@
+"""Background WebP thumbnails and first-page previews for uploaded documents.
+
+Rendering runs in a process pool so large scans never block the event loop.
+Output is keyed by the blob's content hash, so a document uploaded by several
+applications is rendered once; the result is recorded on its stored_blobs row.
+"""
+import asyncio
+import os
+from pathlib import Path
+from PIL import Image, ImageOps
+from config import settings
+from workers import WorkerPool
+
+try:
+    import pypdfium2 as pdfium
+except ImportError:  # without it PDFs are left without previews
+    pdfium = None
+
+WEBP_QUALITY = 80
+
+def _open_first_page(source: str, content_type: str, size: int):
+    if content_type == "application/pdf":
+        if pdfium is None:
+            return None
+        pdf = pdfium.PdfDocument(source)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            return page.render(scale=size / max(width, height)).to_pil()
+        finally:
+            pdf.close()
+    image = Image.open(source)
+    # JPEG scans decode straight to a reduced scale, far cheaper than full size
+    image.draft("RGB", (size, size))
+    return ImageOps.exif_transpose(image)
+
+def _save_webp(image, target: str):
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    tmp_target = f"{target}.tmp"
+    image.save(tmp_target, "WEBP", quality=WEBP_QUALITY)
+    os.replace(tmp_target, target)
+
+def render_document_previews(source: str, thumbnail_target: str, preview_target: str,
+                             content_type: str, thumbnail_size: int, preview_size: int) -> str:
+    """Write the preview and thumbnail for one document; returns the preview status"""
+    image = _open_first_page(source, content_type, preview_size)
+    if image is None:
+        return "unsupported"
+    image = image.convert("RGBA" if image.mode in ("RGBA", "LA", "P") else "RGB")
+    image.thumbnail((preview_size, preview_size))
+    _save_webp(image, preview_target)
+    image.thumbnail((thumbnail_size, thumbnail_size))
+    _save_webp(image, thumbnail_target)
+    return "ready"
+
+class PreviewGenerator:
+    """Schedules preview rendering for stored documents on a bounded worker pool"""
+
+    def __init__(self, root: Path, max_workers: int, thumbnail_size: int, preview_size: int):
+        self.root = Path(root)
+        self.max_workers = max_workers
+        self.thumbnail_size = thumbnail_size
+        self.preview_size = preview_size
+        self.pool = WorkerPool(max_workers)
+        self._tasks = {}
+        self._completed = 0
+        self._failed = 0
+
+    def paths(self, sha256: str):
+        """(thumbnail, preview) paths relative to the documents directory"""
+        prefix = f"previews/{sha256[:2]}/{sha256}"
+        return f"{prefix}-thumb.webp", f"{prefix}-preview.webp"
+
+    def schedule(self, sha256: str, path: str, content_type: str):
+        """Queue rendering for a blob unless it is already in progress"""
+        if sha256 in self._tasks:
+            return
+        task = asyncio.create_task(self._generate(sha256, path, content_type))
+        self._tasks[sha256] = task
+        task.add_done_callback(lambda _: self._tasks.pop(sha256, None))
+
+    async def _generate(self, sha256: str, path: str, content_type: str):
+        # Imported here: database/async_crud are only needed once the app is running
+        import async_crud
+        from database import AsyncSessionLocal
+
+        thumbnail_path, preview_path = self.paths(sha256)
+        try:
+            status = await self.pool.submit(
+                render_document_previews,
+                str(self.root / path), str(self.root / thumbnail_path), str(self.root / preview_path),
+                content_type, self.thumbnail_size, self.preview_size
+            )
+            self._completed += 1
+        except Exception as e:
+            print(f"Preview generation failed for {path}: {e}")
+            status = "failed"
+            self._failed += 1
+        if status != "ready":
+            thumbnail_path = preview_path = None
+        async with AsyncSessionLocal() as db:
+            await async_crud.set_blob_previews(db, sha256, status, thumbnail_path, preview_path)
+
+    def metrics(self) -> dict:
+        return {
+            "workers": self.max_workers,
+            "pdf_support": pdfium is not None,
+            "in_flight": len(self._tasks),
+            "completed": self._completed,
+            "failed": self._failed,
+        }
+
+    def shutdown(self):
+        self.pool.shutdown()
+
+preview_generator = PreviewGenerator(
+    Path("documents"),
+    settings.PREVIEW_WORKERS,
+    settings.DOCUMENT_THUMBNAIL_SIZE,
+    settings.DOCUMENT_PREVIEW_SIZE
+)
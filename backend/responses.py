@@ -0,0 +1,19 @@
+import inspect
+from fastapi import routing
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse, ORJSONResponse
+from config import settings
+
+def _has_pydantic_json_fast_path() -> bool:
+    # Newer FastAPI releases serialize response models straight to JSON bytes in
+    # pydantic-core, but only while the app keeps its default response class.
+    # Overriding it there would add a dict round trip and be slower than orjson saves.
+    return "dump_json" in inspect.signature(routing.serialize_response).parameters
+
+def default_response_class():
+    """Response class for FastAPI(default_response_class=...) per JSON_RESPONSE_CLASS"""
+    choice = settings.JSON_RESPONSE_CLASS
+    if choice == "orjson" or (choice == "auto" and not _has_pydantic_json_fast_path()):
+        return ORJSONResponse
+    # Passed as FastAPI's own placeholder so the fast path stays enabled
+    return Default(JSONResponse)
@@ -1,6 +1,7 @@
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, Field, computed_field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+from media_urls import image_srcset
 
 # User schemas
 class UserBase(BaseModel):
@@ -37,6 +38,8 @@ class ProductImageBase(BaseModel):
     src: str
     alt: Optional[str] = None
     is_primary: bool = False
+    # Content hash of an image uploaded to the media store
+    sha256: Optional[str] = None
 
 class ProductImageCreate(ProductImageBase):
     pass
@@ -46,6 +49,14 @@ class ProductImage(ProductImageBase):
     product_id: int
     created_at: datetime
 
+    @computed_field
+    @property
+    def srcset(self) -> Optional[Dict[str, str]]:
+        """srcset strings of resized variants per format (avif, webp, jpeg), for uploaded images"""
+        if not self.sha256:
+            return None
+        return image_srcset(self.sha256)
+
     class Config:
         from_attributes = True
 
@@ -60,6 +71,8 @@ class ProductBase(BaseModel):
     gemstone: Optional[str] = None
     occasion: Optional[str] = None
     in_stock: bool = True
+    # Tracked stock; when set (or when the product has variants) in_stock follows it
+    stock_quantity: Optional[int] = Field(default=None, ge=0)
     new_arrivals: bool = False
     certified: bool = False
     customizable: bool = False
@@ -79,28 +92,67 @@ class ProductUpdate(BaseModel):
     gemstone: Optional[str] = None
     occasion: Optional[str] = None
     in_stock: Optional[bool] = None
+    stock_quantity: Optional[int] = Field(default=None, ge=0)
     new_arrivals: Optional[bool] = None
     certified: Optional[bool] = None
     customizable: Optional[bool] = None
     specifications: Optional[Dict[str, Any]] = None
 
+class ProductVariantBase(BaseModel):
+    sku: str
+    options: Optional[Dict[str, Any]] = None
+    stock_quantity: int = Field(default=0, ge=0)
+
+class ProductVariantCreate(ProductVariantBase):
+    pass
+
+class ProductVariantUpdate(BaseModel):
+    sku: Optional[str] = None
+    options: Optional[Dict[str, Any]] = None
+    stock_quantity: Optional[int] = Field(default=None, ge=0)
+
+class ProductVariant(ProductVariantBase):
+    id: int
+    product_id: int
+
+    class Config:
+        from_attributes = True
+
 class Product(ProductBase):
     id: int
     images: List[ProductImage] = []
+    variants: List[ProductVariant] = []
     created_at: datetime
     updated_at: Optional[datetime] = None
 
     class Config:
         from_attributes = True
 
+class ProductImportError(BaseModel):
+    line: int
+    error: str
+
+class ProductImportResult(BaseModel):
+    created: int = 0
+    updated: int = 0
+    batches: int = 0
+    failed: int = 0
+    errors: List[ProductImportError] = []
+
 # Order schemas
 class OrderItemBase(BaseModel):
     product_id: int
+    variant_id: Optional[int] = None
     quantity: int
     price: float
 
-class OrderItemCreate(OrderItemBase):
-    pass
+class OrderItemCreate(BaseModel):
+    product_id: int
+    # Required for products with variants
+    variant_id: Optional[int] = None
+    quantity: int
+    # Ignored: items are priced from the catalog when the order is placed
+    price: Optional[float] = None
 
 class OrderItem(OrderItemBase):
     id: int
@@ -115,12 +167,20 @@ class OrderBase(BaseModel):
     status: str = "pending"
     shipping_address: Optional[Dict[str, Any]] = None
 
-class OrderCreate(OrderBase):
+class OrderCreate(BaseModel):
+    shipping_address: Optional[Dict[str, Any]] = None
+    # Ignored: the total is computed from the current product prices
+    total_amount: Optional[float] = None
     items: List[OrderItemCreate]
+    # Two-step checkout: hold the stock for STOCK_RESERVATION_MINUTES until
+    # POST /orders/{id}/confirm, releasing it if the order is not confirmed
+    reserve: bool = False
 
 class Order(OrderBase):
     id: int
     user_id: int
+    # Set while a pending order holds its stock
+    reserved_until: Optional[datetime] = None
     items: List[OrderItem] = []
     created_at: datetime
     updated_at: Optional[datetime] = None
@@ -135,21 +195,59 @@ class WishlistItemBase(BaseModel):
 class WishlistItemCreate(WishlistItemBase):
     pass
 
+class WishlistBatch(BaseModel):
+    product_ids: List[int] = Field(min_length=1, max_length=500)
+
+class WishlistMembership(BaseModel):
+    # The requested ids that are on the wishlist
+    product_ids: List[int]
+
+class ProductSummary(BaseModel):
+    """Listing fields of a product, without its full image and variant lists"""
+    id: int
+    name: str
+    original_price: float
+    sale_price: float
+    discount: float = 0
+    category: Optional[str] = None
+    material: Optional[str] = None
+    gemstone: Optional[str] = None
+    occasion: Optional[str] = None
+    in_stock: bool = True
+    new_arrivals: bool = False
+    certified: bool = False
+    customizable: bool = False
+    primary_image: Optional[ProductImage] = None
+
+    class Config:
+        from_attributes = True
+
 class WishlistItem(WishlistItemBase):
     id: int
     user_id: int
-    product: Product
+    product: ProductSummary
     created_at: datetime
 
     class Config:
         from_attributes = True
 
+# Dashboard schemas
+class DashboardStats(BaseModel):
+    total_products: int
+    total_users: int
+    # Orders and revenue leave out orders that expired unconfirmed
+    total_orders: int
+    total_revenue: float
+
 # Search and filter schemas
 class ProductFilters(BaseModel):
     category: Optional[List[str]] = None
     material: Optional[List[str]] = None
     gemstone: Optional[List[str]] = None
     occasion: Optional[List[str]] = None
+    metal_type: Optional[List[str]] = None
+    metal_tone: Optional[List[str]] = None
+    diamond_weight: Optional[List[str]] = None
     price_min: Optional[float] = None
     price_max: Optional[float] = None
     in_stock: Optional[bool] = None
@@ -157,6 +255,14 @@ class ProductFilters(BaseModel):
     certified: Optional[bool] = None
     customizable: Optional[bool] = None
 
+class ProductFacets(BaseModel):
+    total: int
+    category: Dict[str, int] = {}
+    material: Dict[str, int] = {}
+    gemstone: Dict[str, int] = {}
+    occasion: Dict[str, int] = {}
+    price_range: Dict[str, int] = {}
+
 class ProductSearch(BaseModel):
     query: Optional[str] = None
     filters: Optional[ProductFilters] = None
@@ -331,6 +437,20 @@ class AccountApplicationResponse(BaseModel):
     driver_license_file_path: Optional[str] = None
     sales_tax_permit_file_path: Optional[str] = None
     lease_agreement_file_path: Optional[str] = None
+    driver_license_sha256: Optional[str] = None
+    sales_tax_permit_sha256: Optional[str] = None
+    lease_agreement_sha256: Optional[str] = None
+
+class DocumentFile(BaseModel):
+    sha256: str
+    content_type: str
+    size: int
+    preview_status: str  # pending, ready, unsupported, failed
+    thumbnail_path: Optional[str] = None
+    preview_path: Optional[str] = None
+
+    class Config:
+        from_attributes = True
 
 class AccountApplication(AccountApplicationResponse):
     id: int
@@ -340,6 +460,9 @@ class AccountApplication(AccountApplicationResponse):
     reviewed_by: Optional[int] = None
     reviewed_at: Optional[datetime] = None
     review_notes: Optional[str] = None
+    driver_license_document: Optional[DocumentFile] = None
+    sales_tax_permit_document: Optional[DocumentFile] = None
+    lease_agreement_document: Optional[DocumentFile] = None
 
     class Config:
         from_attributes = True
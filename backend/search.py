@@ -0,0 +1,99 @@
+import re
+from sqlalchemy import Column, Integer, MetaData, Table, Text, func, literal_column, select, text
+from sqlalchemy.exc import OperationalError
+
+# Full-text index over the searchable product columns. It is an external-content
+# FTS5 table, so the text itself lives only in `products` and the index is kept
+# in sync by triggers on insert/update/delete.
+FTS_TABLE = "products_fts"
+FTS_COLUMNS = ["name", "description", "category", "material", "gemstone", "occasion"]
+
+# bm25() column weights, in FTS_COLUMNS order: a hit in the name ranks above a
+# hit in the classification columns, which rank above the long description.
+BM25_WEIGHTS = [10.0, 1.0, 4.0, 4.0, 2.0, 2.0]
+
+products_fts = Table(
+    FTS_TABLE,
+    MetaData(),
+    Column("rowid", Integer, primary_key=True),
+    *[Column(name, Text) for name in FTS_COLUMNS],
+)
+
+_fts_enabled = False
+
+def _column_list(prefix: str = "") -> str:
+    return ", ".join(f"{prefix}{name}" for name in FTS_COLUMNS)
+
+def _create_statements():
+    columns = _column_list()
+    new_values = _column_list("new.")
+    old_values = _column_list("old.")
+    return [
+        f"""CREATE VIRTUAL TABLE {FTS_TABLE} USING fts5(
+            {columns},
+            content='products', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON products BEGIN
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON products BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+        END""",
+        f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au AFTER UPDATE OF {columns} ON products BEGIN
+            INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            INSERT INTO {FTS_TABLE}(rowid, {columns}) VALUES (new.id, {new_values});
+        END""",
+    ]
+
+def init_search_index(engine) -> bool:
+    """Create the FTS5 index and its sync triggers if missing; returns whether FTS is available"""
+    global _fts_enabled
+    if engine.dialect.name != "sqlite":
+        _fts_enabled = False
+        return False
+
+    try:
+        with engine.begin() as conn:
+            exists = conn.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+                {"name": FTS_TABLE},
+            ).first()
+            statements = _create_statements()
+            if exists:
+                statements = statements[1:]
+            for statement in statements:
+                conn.execute(text(statement))
+            if not exists:
+                # Index products that were written before the index existed
+                conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+    except OperationalError as e:
+        print(f"Full-text search unavailable, falling back to LIKE search: {e}")
+        _fts_enabled = False
+        return False
+
+    _fts_enabled = True
+    return True
+
+def rebuild_search_index(engine):
+    with engine.begin() as conn:
+        conn.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"))
+
+def is_enabled() -> bool:
+    return _fts_enabled
+
+def build_match_expression(query: str) -> str:
+    """Turn free text into an FTS5 query: every term must match, each as a prefix"""
+    terms = re.findall(r"\w+", query.lower())
+    return " ".join(f'"{term}"*' for term in terms)
+
+def ranked_matches(match_expression: str):
+    """Select (product_id, rank) for matching products; lower rank is more relevant"""
+    fts = literal_column(FTS_TABLE)
+    return (
+        select(
+            products_fts.c.rowid.label("product_id"),
+            func.bm25(fts, *BM25_WEIGHTS).label("rank"),
+        )
+        .where(fts.op("MATCH")(match_expression))
+    )
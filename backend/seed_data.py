@@ -609,9 +609,7 @@ def seed_database():
         # Check if products already exist
         existing_products = db.query(models.Product).count()
         if existing_products == 0:
-            for product_data in sample_products:
-                product_create = schemas.ProductCreate(**product_data)
-                crud.create_product(db=db, product=product_create)
+            crud.bulk_upsert_products(db, [schemas.ProductCreate(**product_data) for product_data in sample_products])
             print(f"Created {len(sample_products)} sample products")
         else:
             print(f"Database already contains {existing_products} products")
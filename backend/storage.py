@@ -0,0 +1,129 @@
+"""Content-addressed storage for uploaded files (application documents, product images).
+
+Uploads are streamed to a temporary file in chunks while being hashed, then
+moved to a path derived from their SHA-256, so identical uploads share one
+file on disk. For application documents the database tracks how many fields
+reference each blob (see crud.add_blob_reference).
+"""
+import asyncio
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional
+from fastapi import UploadFile
+
+CHUNK_SIZE = 1024 * 1024
+
+# Types a store can accept, detected from the leading bytes rather than trusting
+# the client's Content-Type or file name; each store picks a subset via its size limits
+DOCUMENT_EXTENSIONS = {
+    "application/pdf": ".pdf",
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/webp": ".webp",
+}
+
+def sniff_content_type(head: bytes) -> Optional[str]:
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+class UploadRejected(ValueError):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+@dataclass
+class StoredDocument:
+    sha256: str
+    size: int
+    content_type: str
+    path: str  # relative to the store root, as recorded in the database
+    created: bool  # False when an identical blob was already on disk
+
+def _format_size(size: int) -> str:
+    for unit in ("bytes", "KB", "MB"):
+        if size < 1024 or unit == "MB":
+            return f"{size:.3g} {unit}"
+        size /= 1024
+
+def _write_chunk(out, digest, chunk: bytes):
+    digest.update(chunk)
+    out.write(chunk)
+
+class BlobStore:
+    def __init__(self, root: Path, size_limits: Dict[str, int]):
+        self.root = Path(root)
+        self.size_limits = size_limits
+        self.tmp_dir = self.root / "blobs" / "tmp"
+
+    def relative_path(self, sha256: str, content_type: str) -> str:
+        return f"blobs/{sha256[:2]}/{sha256}{DOCUMENT_EXTENSIONS[content_type]}"
+
+    def full_path(self, relative_path: str) -> Path:
+        return self.root / relative_path
+
+    async def save(self, upload: UploadFile) -> StoredDocument:
+        """Stream an upload into the store, rejecting unaccepted types and oversized files"""
+        name = upload.filename or "upload"
+        if upload.size is not None and upload.size > max(self.size_limits.values()):
+            raise UploadRejected(413, f"{name} is too large")
+        head = await upload.read(CHUNK_SIZE)
+        content_type = sniff_content_type(head)
+        if content_type not in self.size_limits:
+            accepted = ", ".join(DOCUMENT_EXTENSIONS[accepted_type][1:].upper() for accepted_type in self.size_limits)
+            raise UploadRejected(415, f"{name}: unsupported file type (accepted: {accepted})")
+        limit = self.size_limits[content_type]
+
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.tmp_dir)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with os.fdopen(fd, "wb") as out:
+                chunk = head
+                while chunk:
+                    size += len(chunk)
+                    if size > limit:
+                        raise UploadRejected(413, f"{name} exceeds the {_format_size(limit)} limit for {content_type}")
+                    await asyncio.to_thread(_write_chunk, out, digest, chunk)
+                    chunk = await upload.read(CHUNK_SIZE)
+
+            sha256 = digest.hexdigest()
+            relative_path = self.relative_path(sha256, content_type)
+            final_path = self.full_path(relative_path)
+            created = not final_path.exists()
+            if created:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                os.replace(tmp_path, final_path)
+            else:
+                os.unlink(tmp_path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        return StoredDocument(sha256, size, content_type, relative_path, created)
+
+    def resolve(self, relative_path: str) -> Optional[Path]:
+        """Path of a stored file, or None if it is missing or outside the store"""
+        root = self.root.resolve()
+        path = (root / relative_path).resolve()
+        if not path.is_relative_to(root) or path.is_relative_to(self.tmp_dir.resolve()) or not path.is_file():
+            return None
+        return path
+
+    def delete(self, relative_path: str) -> bool:
+        try:
+            self.full_path(relative_path).unlink()
+            return True
+        except FileNotFoundError:
+            return False
@@ -0,0 +1,36 @@
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+# Point the app at a throwaway database before any backend module reads settings
+_tmp_dir = tempfile.mkdtemp(prefix="sj-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_dir}/test.db"
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pytest
+import crud
+import schemas
+from database import Base, SessionLocal, engine
+
+@pytest.fixture
+def db():
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+@pytest.fixture
+def user(db):
+    return crud.create_user(
+        db, schemas.UserCreate(email="buyer@example.com", name="Buyer", password="unused"), hashed_password="x"
+    )
+
+@pytest.fixture
+def product(db):
+    return crud.create_product(db, schemas.ProductCreate(
+        name="Solitaire Ring", original_price=1200, sale_price=1000, stock_quantity=5
+    ))
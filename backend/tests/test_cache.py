@@ -0,0 +1,55 @@
+import asyncio
+import auth
+import crud
+from cache import TTLCache, principal_cache, wishlist_cache
+from database import AsyncSessionLocal
+
+def test_set_is_skipped_when_invalidated_during_the_read():
+    cache = TTLCache(10, 60)
+    generation = cache.generation("user")
+    cache.invalidate("user")
+    cache.set("user", "stale", generation=generation)
+    assert cache.get("user") is None
+    cache.set("user", "fresh", generation=cache.generation("user"))
+    assert cache.get("user") == "fresh"
+
+def test_generation_survives_being_dropped_from_the_bounded_map():
+    cache = TTLCache(2, 60)
+    generation = cache.generation("user")
+    cache.invalidate("user")
+    cache.invalidate("a")
+    cache.invalidate("b")
+    cache.set("user", "stale", generation=generation)
+    assert cache.get("user") is None
+
+def test_wishlist_read_racing_a_write_is_not_cached(db, user, product, monkeypatch):
+    wishlist_cache.clear()
+    real_set = wishlist_cache.set
+
+    def set_after_a_concurrent_add(key, value, ttl=None, generation=None):
+        # The add commits and invalidates after the read, before the set
+        crud.add_to_wishlist_batch(db, user.id, [product.id])
+        real_set(key, value, ttl, generation)
+
+    monkeypatch.setattr(wishlist_cache, "set", set_after_a_concurrent_add)
+    assert crud.get_wishlist_product_ids(db, user.id) == frozenset()
+    monkeypatch.undo()
+    assert crud.get_wishlist_product_ids(db, user.id) == {product.id}
+
+def test_principal_read_racing_an_update_is_not_cached(db, user, monkeypatch):
+    principal_cache.clear()
+    real_lookup = auth._get_user_by_email
+
+    async def lookup_then_demote(session, email):
+        found = await real_lookup(session, email)
+        # The user is changed and invalidated after the read, before the set
+        principal_cache.invalidate(email)
+        return found
+
+    async def current_user():
+        async with AsyncSessionLocal() as session:
+            return await auth.get_current_user(auth.create_access_token({"sub": user.email}), session)
+
+    monkeypatch.setattr(auth, "_get_user_by_email", lookup_then_demote)
+    assert asyncio.run(current_user()).email == user.email
+    assert principal_cache.get(user.email) is None
@@ -0,0 +1,62 @@
+import crud
+import schemas
+from catalog import CatalogCache
+
+def _load(db, cache):
+    cache.load(crud._product_query(db).all(), cache.version)
+
+def test_reload_without_changes_keeps_validators(db, product):
+    cache = CatalogCache(True, 60)
+    _load(db, cache)
+    version, validators = cache.version, cache.validators()
+    _load(db, cache)
+    assert cache.version == version
+    assert cache.validators() == validators
+
+def test_workers_with_the_same_data_agree(db, product):
+    first, second = CatalogCache(True, 60), CatalogCache(True, 60)
+    _load(db, first)
+    _load(db, second)
+    assert first.validators() == second.validators()
+    assert first.last_modified is not None
+
+def test_writes_change_the_content_tag(db, product):
+    cache = CatalogCache(True, 60)
+    _load(db, cache)
+    tag = cache.content_tag
+    crud.update_product(db, product.id, schemas.ProductUpdate(sale_price=900))
+    _load(db, cache)
+    assert cache.content_tag != tag
+
+def test_fingerprint_changes_on_same_second_edits(db, product):
+    token, _ = crud.get_catalog_fingerprint(db)
+    crud.update_product(db, product.id, schemas.ProductUpdate(sale_price=900))
+    edited, _ = crud.get_catalog_fingerprint(db)
+    crud.update_product(db, product.id, schemas.ProductUpdate(sale_price=800))
+    assert len({token, edited, crud.get_catalog_fingerprint(db)[0]}) == 3
+
+def test_fingerprint_sees_stock_taken_by_orders(db, product, user):
+    token, _ = crud.get_catalog_fingerprint(db)
+    crud.create_order(db, schemas.OrderCreate(
+        shipping_address={"line1": "1 Main"}, items=[{"product_id": product.id, "quantity": 1}]
+    ), user.id)
+    assert crud.get_catalog_fingerprint(db)[0] != token
+
+def test_fingerprint_sees_new_images(db, product):
+    token, _ = crud.get_catalog_fingerprint(db)
+    crud.add_product_image(db, product.id, schemas.ProductImageCreate(src="https://example.com/ring.jpg"))
+    assert crud.get_catalog_fingerprint(db)[0] != token
+
+def test_patched_cache_matches_a_fresh_load(db, product):
+    patched = CatalogCache(True, 60)
+    _load(db, patched)
+    other = crud.create_product(db, schemas.ProductCreate(name="Hoop Earrings", original_price=300, sale_price=250))
+    patched.upsert(other)
+    crud.update_product(db, product.id, schemas.ProductUpdate(stock_quantity=4))
+    row = crud.get_product(db, product.id)
+    patched.update_stock([(row.id, row.in_stock, row.stock_quantity, row.updated_at)], {})
+    crud.delete_product(db, other.id)
+    patched.remove(other.id)
+    fresh = CatalogCache(True, 60)
+    _load(db, fresh)
+    assert patched.validators() == fresh.validators()
@@ -0,0 +1,13 @@
+import crud
+import schemas
+
+def test_price_facets_match_the_price_filter(db):
+    for price in (50, 100, 250, 500, 2500, 4000):
+        crud.create_product(db, schemas.ProductCreate(name=f"Ring {price}", original_price=price, sale_price=price))
+    facets = crud.get_product_facets(db, None)
+    assert facets["total"] == 6
+    for label, (price_min, price_max) in crud.PRICE_RANGES.items():
+        matches = crud.search_products(
+            db, None, schemas.ProductFilters(price_min=price_min, price_max=price_max), limit=100
+        )
+        assert facets["price_range"].get(label, 0) == len(matches), label
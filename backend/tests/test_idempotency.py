@@ -0,0 +1,42 @@
+import asyncio
+import json
+from types import SimpleNamespace
+from pydantic import BaseModel
+import crud
+from idempotency import IdempotencyStore, _principal_scope
+
+class Result(BaseModel):
+    calls: int
+
+def test_long_request_keeps_its_claim_against_another_worker(db):
+    calls = []
+
+    async def slow_call():
+        await asyncio.sleep(1.0)
+        calls.append(1)
+        return {"calls": len(calls)}
+
+    async def scenario():
+        # Two stores stand in for two worker processes sharing the database
+        first = IdempotencyStore(ttl=60, cache_size=10, wait_seconds=5, lease_seconds=0.3)
+        second = IdempotencyStore(ttl=60, cache_size=10, wait_seconds=5, lease_seconds=0.3)
+        running = asyncio.create_task(first.run("orders:1:k", "hash", slow_call, Result))
+        await asyncio.sleep(0.6)  # well past the initial lease
+        retry = await second.run("orders:1:k", "hash", slow_call, Result)
+        return await running, retry
+
+    original, retry = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert json.loads(retry.body) == json.loads(original.body) == {"calls": 1}
+    assert retry.headers["Idempotent-Replayed"] == "true"
+
+def test_only_the_claim_holder_can_complete(db):
+    assert crud.claim_idempotency_key(db, "orders:1:k", "hash", "token-a", 60) is None
+    assert crud.complete_idempotency_key(db, "orders:1:k", "token-b", 200, "{}", 60) is False
+    assert crud.complete_idempotency_key(db, "orders:1:k", "token-a", 200, "{}", 60) is True
+    assert crud.complete_idempotency_key(db, "orders:1:k", "token-a", 200, "{}", 60) is False
+
+def test_users_and_applications_do_not_share_keys():
+    user = SimpleNamespace(id=3, is_application=False)
+    application = SimpleNamespace(id=3, is_application=True)
+    assert _principal_scope(user) != _principal_scope(application)
@@ -0,0 +1,40 @@
+import asyncio
+import io
+import pytest
+from fastapi import UploadFile
+from PIL import Image
+import images
+import storage
+
+def png_bytes() -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", (40, 30), "gold").save(buffer, "PNG")
+    return buffer.getvalue()
+
+@pytest.fixture
+def service(tmp_path):
+    return images.ProductImageService(tmp_path, 0, 1024 * 1024, 1024 * 1024)
+
+def upload(data: bytes) -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename="ring.png")
+
+def test_truncated_upload_is_rejected_and_removed(service, tmp_path):
+    with pytest.raises(storage.UploadRejected) as rejected:
+        asyncio.run(service.save(upload(png_bytes()[:-30])))
+    assert rejected.value.status_code == 422
+    assert not [path for path in (tmp_path / "blobs").rglob("*.png")]
+    stored = asyncio.run(service.save(upload(png_bytes())))
+    assert service.original_path(stored.sha256) is not None
+
+def test_render_failure_is_remembered(service, monkeypatch):
+    stored = asyncio.run(service.save(upload(png_bytes())))
+    # Corrupt the original after it was accepted
+    service.originals.full_path(stored.path).write_bytes(png_bytes()[:-30])
+    renders = []
+    real_render = images.render_derivative
+    monkeypatch.setattr(images, "render_derivative", lambda *args: renders.append(args) or real_render(*args))
+    for _ in range(2):
+        with pytest.raises(images.RenderFailed) as failed:
+            asyncio.run(service.derivative(stored.sha256, 200, "jpeg"))
+        assert failed.value.status_code == 422
+    assert len(renders) == 1
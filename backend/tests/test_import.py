@@ -0,0 +1,47 @@
+import asyncio
+import catalog_io
+import crud
+import schemas
+
+def test_import_leaves_omitted_columns_alone(db, product):
+    crud.add_product_image(db, product.id, schemas.ProductImageCreate(src="https://example.com/ring.jpg"))
+    result = crud.bulk_upsert_products(db, [
+        schemas.ProductCreate(name=product.name, original_price=1300, sale_price=1100),
+        schemas.ProductCreate(name="Pearl Necklace", original_price=500, sale_price=450, description="New"),
+    ])
+    assert result == {"created": 1, "updated": 1}
+    updated = crud.get_product(db, product.id)
+    assert (updated.sale_price, updated.stock_quantity, updated.in_stock) == (1100, 5, True)
+    assert [image.src for image in updated.images] == ["https://example.com/ring.jpg"]
+
+def test_import_replaces_columns_it_sets(db, product):
+    crud.bulk_upsert_products(db, [
+        schemas.ProductCreate(name=product.name, original_price=1200, sale_price=1000, stock_quantity=0, images=[])
+    ])
+    updated = crud.get_product(db, product.id)
+    assert (updated.stock_quantity, updated.in_stock, updated.images) == (0, False, [])
+
+def test_import_updates_rows_with_different_columns_together(db, product):
+    other = crud.create_product(db, schemas.ProductCreate(name="Hoop Earrings", original_price=300, sale_price=250))
+    crud.bulk_upsert_products(db, [
+        schemas.ProductCreate(name=product.name, original_price=1200, sale_price=900),
+        schemas.ProductCreate(name=other.name, original_price=300, sale_price=250, category="earrings", stock_quantity=3),
+    ])
+    first, second = crud.get_product(db, product.id), crud.get_product(db, other.id)
+    assert (first.sale_price, first.stock_quantity, first.category) == (900, 5, None)
+    assert (second.category, second.stock_quantity) == ("earrings", 3)
+
+def _parse(body: bytes, format: str):
+    async def chunks():
+        yield body
+
+    async def collect():
+        return [(line, error) async for line, _, error in catalog_io.iter_products(chunks(), format)]
+    return asyncio.run(collect())
+
+def test_lines_that_are_not_utf8_are_reported():
+    body = b'{"name": "Ring", "original_price": 1, "sale_price": 1}\n{"name": "\xff"}\n{"name": "Band", "original_price": 2, "sale_price": 2}\n'
+    assert _parse(body, "ndjson") == [(1, None), (2, "not valid UTF-8 (byte 11 of the line)"), (3, None)]
+    assert _parse(b"name,original_price,sale_price\nRing,1,1\n\xffRing,1,1\n", "csv") == [
+        (2, None), (3, "not valid UTF-8 (byte 1 of the line)")
+    ]
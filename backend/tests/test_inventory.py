@@ -0,0 +1,98 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import pytest
+import crud
+import models
+import schemas
+from database import SessionLocal
+
+def place_order(db, user_id, product_id, quantity=1, reserve=False):
+    order = schemas.OrderCreate(items=[schemas.OrderItemCreate(product_id=product_id, quantity=quantity)], reserve=reserve)
+    return crud.create_order(db, order, user_id)
+
+def stock_of(db, product_id):
+    db.expire_all()
+    return db.get(models.Product, product_id).stock_quantity
+
+def lapse(db, order_id):
+    db.query(models.Order).filter(models.Order.id == order_id).update(
+        {"reserved_until": datetime.utcnow() - timedelta(minutes=1)}
+    )
+    db.commit()
+
+def test_concurrent_orders_cannot_oversell(db, user, product):
+    def buy(_):
+        with SessionLocal() as session:
+            try:
+                place_order(session, user.id, product.id)
+                return "placed"
+            except crud.OrderRejected as e:
+                return e.status_code
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(buy, range(20)))
+
+    assert results.count("placed") == 5
+    assert results.count(409) == 15
+    assert stock_of(db, product.id) == 0
+    assert db.get(models.Product, product.id).in_stock is False
+
+def test_order_larger_than_stock_writes_nothing(db, user, product):
+    with pytest.raises(crud.OrderRejected) as rejected:
+        place_order(db, user.id, product.id, quantity=6)
+    assert rejected.value.status_code == 409
+    assert stock_of(db, product.id) == 5
+    assert db.query(models.Order).count() == 0
+
+def test_lapsed_reservation_is_expired_and_restocked(db, user, product):
+    order = place_order(db, user.id, product.id, quantity=2, reserve=True)
+    assert order.reserved_until is not None
+    assert stock_of(db, product.id) == 3
+
+    lapse(db, order.id)
+    assert crud.release_expired_reservations(db) == 1
+    db.expire_all()
+    assert db.get(models.Order, order.id).status == "expired"
+    assert stock_of(db, product.id) == 5
+
+def test_orders_without_reserve_are_not_swept(db, user, product):
+    order = place_order(db, user.id, product.id, quantity=2)
+    assert order.reserved_until is None
+    assert crud.release_expired_reservations(db) == 0
+    assert stock_of(db, product.id) == 3
+
+def test_confirm_keeps_the_stock(db, user, product):
+    order = place_order(db, user.id, product.id, reserve=True)
+    confirmed = crud.confirm_order(db, order.id, user.id)
+    assert confirmed.status == "confirmed"
+    assert confirmed.reserved_until is None
+    assert crud.release_expired_reservations(db) == 0
+    assert stock_of(db, product.id) == 4
+
+def test_lapsed_reservation_cannot_be_confirmed_before_the_sweep(db, user, product):
+    order = place_order(db, user.id, product.id, reserve=True)
+    lapse(db, order.id)
+
+    assert crud.confirm_order(db, order.id, user.id) is False
+    assert crud.release_expired_reservations(db) == 1
+    assert stock_of(db, product.id) == 5
+
+def test_variant_with_orders_cannot_be_deleted(db, user, product):
+    crud.create_product_variant(db, product.id, schemas.ProductVariantCreate(sku="RING-6", stock_quantity=2))
+    ordered = crud.create_product_variant(db, product.id, schemas.ProductVariantCreate(sku="RING-7", stock_quantity=2))
+    variant_ids = {variant.sku: variant.id for variant in ordered.variants}
+    order = schemas.OrderCreate(items=[
+        schemas.OrderItemCreate(product_id=product.id, variant_id=variant_ids["RING-7"], quantity=1)
+    ])
+    crud.create_order(db, order, user.id)
+
+    assert crud.delete_product_variant(db, product.id, variant_ids["RING-7"]) is False
+    remaining = crud.delete_product_variant(db, product.id, variant_ids["RING-6"])
+    assert [variant.sku for variant in remaining.variants] == ["RING-7"]
+    assert crud.delete_product(db, product.id) is False
+    assert crud.get_product_variant_by_sku(db, "RING-7") is not None
+
+@pytest.mark.parametrize("schema", [schemas.ProductUpdate, schemas.ProductVariantUpdate])
+def test_negative_stock_is_rejected(schema):
+    with pytest.raises(ValueError):
+        schema(stock_quantity=-3)
@@ -0,0 +1,19 @@
+import base64
+import json
+import pytest
+from pagination import InvalidCursor, decode_cursor, encode_cursor, paginate_list
+
+def raw_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode().rstrip("=")
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor([0.5, 12]), 2) == [0.5, 12]
+
+@pytest.mark.parametrize("key", [[{"a": 1}], [[1]], ["1"], [None], [True], [1, 2]])
+def test_malformed_cursor_keys_are_rejected(key):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(raw_cursor(key), 1)
+
+def test_paginate_list_rejects_non_numeric_cursor():
+    with pytest.raises(InvalidCursor):
+        paginate_list([1, 2, 3], lambda item: (item,), 1, cursor="W3siYSI6MX1d")
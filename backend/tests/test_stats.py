@@ -0,0 +1,27 @@
+import itertools
+import crud
+import models
+import schemas
+
+def place_order(db, user_id, product_id):
+    order = schemas.OrderCreate(shipping_address={"line1": "1 Main"}, items=[{"product_id": product_id, "quantity": 1}])
+    return crud.create_order(db, order, user_id)
+
+def test_sharded_counters_add_up(db, user, product, monkeypatch):
+    shards = itertools.cycle(range(3))
+    monkeypatch.setattr(crud.random, "randrange", lambda stop: next(shards))
+    for _ in range(5):
+        place_order(db, user.id, product.id)
+    shards = db.query(models.StatCounter.shard).filter(models.StatCounter.name == "orders").all()
+    assert len(shards) == 3
+    stats = crud.get_stats(db)
+    assert (stats["users"], stats["products"], stats["orders"], stats["revenue"]) == (1, 1, 5, 5000)
+    assert crud.reconcile_stat_counters(db) == {}
+
+def test_reconcile_corrects_drift_across_shards(db, user, product):
+    for _ in range(3):
+        place_order(db, user.id, product.id)
+    db.query(models.StatCounter).filter(models.StatCounter.name == "orders").update({"value": 7})
+    db.commit()
+    assert crud.reconcile_stat_counters(db)["orders"] < 0
+    assert crud.get_stats(db)["orders"] == 3
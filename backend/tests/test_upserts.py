@@ -0,0 +1,29 @@
+from types import SimpleNamespace
+import crud
+import models
+import schemas
+
+def test_fallbacks_without_on_conflict_support(db, user, product, monkeypatch):
+    monkeypatch.setattr(crud, "CONFLICT_INSERTS", {})
+    crud.add_to_wishlist_batch(db, user.id, [product.id])
+    crud.add_to_wishlist_batch(db, user.id, [product.id])
+    assert crud.get_wishlist_product_ids(db, user.id) == {product.id}
+
+    document = SimpleNamespace(sha256="a" * 64, path="blobs/a", content_type="image/png", size=3)
+    for _ in range(2):
+        crud.add_blob_reference(db, document)
+    db.commit()
+    assert crud.get_stored_blob(db, document.sha256).ref_count == 2
+
+    assert crud.claim_idempotency_key(db, "k", "hash", "first", 60) is None
+    assert crud.claim_idempotency_key(db, "k", "hash", "second", 60).claim_token == "first"
+
+    for _ in range(2):
+        crud.create_order(db, schemas.OrderCreate(
+            shipping_address={"line1": "1 Main"}, items=[{"product_id": product.id, "quantity": 1}]
+        ), user.id)
+    assert crud.get_stats(db)["orders"] == 2
+    db.query(models.StatCounter).filter(models.StatCounter.name == "orders").update({"value": 7})
+    db.commit()
+    crud.reconcile_stat_counters(db)
+    assert crud.get_stats(db)["orders"] == 2
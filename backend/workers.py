@@ -0,0 +1,33 @@
+"""Process pools for CPU-bound work (bcrypt, image variants, document previews)."""
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+class WorkerPool:
+    """A ProcessPoolExecutor started on first use, so importing a module forks nothing.
+
+    A worker count of 0 uses the event loop's default thread pool instead.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self.max_workers <= 0:
+            return None
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+            return self._executor
+
+    def submit(self, function, *args) -> asyncio.Future:
+        """Run function(*args) in the pool; the returned future may be awaited by several callers"""
+        return asyncio.get_running_loop().run_in_executor(self._get_executor(), function, *args)
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
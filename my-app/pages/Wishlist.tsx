@@ -33,10 +33,11 @@ export default function Wishlist() {
         const transformedItems = response.data.map((item: any) => ({
           id: item.product.id.toString(),
           name: item.product.name,
-          images: item.product.images?.map((img: any) => ({
-            src: img.src,
-            alt: img.alt || item.product.name
-          })) || [{ src: "https://images.unsplash.com/photo-1605100804763-247f67b3557e?w=400&h=400&fit=crop", alt: item.product.name }],
+          images: item.product.primary_image ? [{
+            src: item.product.primary_image.src,
+            alt: item.product.primary_image.alt || item.product.name,
+            srcset: item.product.primary_image.srcset
+          }] : [{ src: "https://images.unsplash.com/photo-1605100804763-247f67b3557e?w=400&h=400&fit=crop", alt: item.product.name }],
           originalPrice: item.product.original_price,
           salePrice: item.product.sale_price,
           discount: item.product.discount,
@@ -47,9 +48,7 @@ export default function Wishlist() {
           inStock: item.product.in_stock,
           newArrivals: item.product.new_arrivals,
           certified: item.product.certified,
-          customizable: item.product.customizable,
-          description: item.product.description,
-          specifications: item.product.specifications
+          customizable: item.product.customizable
         }))
         setWishlistItems(transformedItems)
       }
@@ -230,10 +229,12 @@ export default function Wishlist() {
                   wishlistItems.forEach(item => addItem(item, 1))
                   
                   // Remove all items from wishlist in backend
-                  const removePromises = wishlistItems.map(item => 
-                    apiService.removeFromWishlist(parseInt(item.id))
+                  const response = await apiService.removeManyFromWishlist(
+                    wishlistItems.map(item => parseInt(item.id))
                   )
-                  await Promise.all(removePromises)
+                  if (response.error) {
+                    throw new Error(response.error)
+                  }
                   
                   // Clear local state
                   setWishlistItems([])
@@ -1,4 +1,4 @@
-import React, { useState, useEffect } from "react";
+import React, { useState } from "react";
 import { Link } from "react-router-dom";
 import {
   ChevronLeft,
@@ -11,6 +11,7 @@ import {
 import { useCartStore, useWishlistStore, useAuthStore } from "../store/store";
 import { cn } from "../utils/cn";
 import apiService from "../services/api";
+import Image, { ImageSrcSet } from "./Image";
 
 // Accessible, stylish icon button
 interface IconButtonProps {
@@ -67,6 +68,7 @@ const DiscountBadge: React.FC<DiscountBadgeProps> = ({
 interface ProductImage {
   src: string;
   alt: string;
+  srcset?: ImageSrcSet | null;
 }
 
 export interface ProductCardProps {
@@ -90,7 +92,6 @@ export const ProductCard: React.FC<ProductCardProps> = ({
 }) => {
   const [currentImageIndex, setCurrentImageIndex] = useState<number>(0);
   const [quantity, setQuantity] = useState<number>(1);
-  const [isWishlisted, setIsWishlisted] = useState<boolean>(false);
   const [isHovered, setIsHovered] = useState<boolean>(false);
   const [wishlistLoading, setWishlistLoading] = useState<boolean>(false);
   const [wishlistAnimation, setWishlistAnimation] = useState<boolean>(false);
@@ -98,13 +99,11 @@ export const ProductCard: React.FC<ProductCardProps> = ({
   const [cartLoading, setCartLoading] = useState<boolean>(false);
 
   const { addItem } = useCartStore();
-  const { addItem: addToWishlist, removeItem: removeFromWishlist, isInWishlist } = useWishlistStore();
+  const { addItem: addToWishlist, removeItem: removeFromWishlist } = useWishlistStore();
+  // Follows the store, which product grids sync with the server's wishlist
+  const isWishlisted = useWishlistStore((state) => state.items.some((item) => item.id === id));
   const { isAuthenticated } = useAuthStore();
-
-  // Check if item is in wishlist
-  useEffect(() => {
-    setIsWishlisted(isInWishlist(id));
-  }, [id, isInWishlist]);
+  const currentImage = images[currentImageIndex];
 
   const handleWishlistToggle = async (e: React.MouseEvent) => {
     e.stopPropagation();
@@ -123,7 +122,6 @@ export const ProductCard: React.FC<ProductCardProps> = ({
         // Remove from wishlist
         await apiService.removeFromWishlist(parseInt(id));
         removeFromWishlist(id);
-        setIsWishlisted(false);
       } else {
         // Add to wishlist
         await apiService.addToWishlist(parseInt(id));
@@ -135,7 +133,6 @@ export const ProductCard: React.FC<ProductCardProps> = ({
           salePrice,
           discount
         });
-        setIsWishlisted(true);
       }
     } catch (error) {
       console.error('Failed to update wishlist:', error);
@@ -181,13 +178,17 @@ export const ProductCard: React.FC<ProductCardProps> = ({
     >
       {/* Image Section */}
       <div className="relative aspect-square bg-gray-50 overflow-hidden">
-        <img
-          src={images[currentImageIndex]?.src}
-          alt={images[currentImageIndex]?.alt}
-          className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-105"
-          style={{ minHeight: 180 }}
-          draggable={false}
-        />
+        {currentImage && (
+          <Image
+            src={currentImage.src}
+            alt={currentImage.alt}
+            srcset={currentImage.srcset}
+            sizes="(min-width: 1024px) 25vw, (min-width: 640px) 50vw, 100vw"
+            className="w-full h-full object-cover transition-transform duration-500 group-hover:scale-105"
+            style={{ minHeight: 180 }}
+            draggable={false}
+          />
+        )}
 
         {/* Navigation */}
         {images.length > 1 && isHovered && (
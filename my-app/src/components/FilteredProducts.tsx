@@ -46,13 +46,34 @@ export default function FilteredProducts({ filters, onClearFilters }: FilteredPr
   const [cartStates, setCartStates] = useState<{[key: number]: {loading: boolean, animation: boolean}}>({});
 
   const { addItem } = useCartStore();
-  const { addItem: addToWishlist, removeItem: removeFromWishlist, isInWishlist } = useWishlistStore();
+  const { addItem: addToWishlist, removeItem: removeFromWishlist, isInWishlist, syncMembership } = useWishlistStore();
   const { isAuthenticated } = useAuthStore();
 
   useEffect(() => {
     fetchFilteredProducts();
   }, [filters]);
 
+  // Mark wishlisted products with one membership lookup for the whole grid
+  useEffect(() => {
+    if (!isAuthenticated || products.length === 0) return;
+    apiService.getWishlistMembership(products.map(product => product.id))
+      .then(response => {
+        if (response.data) {
+          syncMembership(
+            products.map(product => ({
+              id: product.id.toString(),
+              name: product.name,
+              images: product.images || [],
+              originalPrice: product.original_price,
+              salePrice: product.sale_price,
+              discount: product.discount
+            })),
+            response.data.product_ids.map(String)
+          );
+        }
+      });
+  }, [products, isAuthenticated, syncMembership]);
+
   const handleWishlistToggle = async (productId: number, e: React.MouseEvent) => {
     e.stopPropagation();
     
@@ -1,20 +1,38 @@
 import React from "react";
+import { cn } from "../utils/cn";
+
+// Resized variants per format ("avif", "webp", "jpeg"), as returned by the API
+export type ImageSrcSet = Record<string, string>;
 
 interface ImageProps extends React.ImgHTMLAttributes<HTMLImageElement> {
   src: string;
   alt: string;
+  srcset?: ImageSrcSet | null;
 }
 
-const Image: React.FC<ImageProps> = ({ src, alt, className = "", ...props }) => {
-  return (
+const Image: React.FC<ImageProps> = ({ src, alt, srcset, sizes = "100vw", className = "", ...props }) => {
+  const img = (
     <img
       src={src}
+      srcSet={srcset?.jpeg}
+      sizes={srcset ? sizes : undefined}
       alt={alt}
       loading="lazy"
-      className={`object-contain ${className}`}
+      className={cn("object-contain", className)}
       {...props}
     />
   );
+  if (!srcset) {
+    return img;
+  }
+  // The browser takes the first format it supports and picks a width from sizes
+  return (
+    <picture>
+      {srcset.avif && <source type="image/avif" srcSet={srcset.avif} sizes={sizes} />}
+      {srcset.webp && <source type="image/webp" srcSet={srcset.webp} sizes={sizes} />}
+      {img}
+    </picture>
+  );
 };
 
 export default Image;
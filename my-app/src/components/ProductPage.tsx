@@ -6,7 +6,8 @@ import { ProductCard } from "./Card";
 import Header from "./Header";
 import Footer from "./Footer";
 import { searchProducts } from "../data/products";
-import { useSearchStore } from "../store/store";
+import { apiService } from "../services/api";
+import { useAuthStore, useSearchStore, useWishlistStore } from "../store/store";
 
 // Lazy load FilterPanel (like Next.js dynamic import)
 const FilterPanel = lazy(() => import("./FilterPanel"));
@@ -123,6 +124,8 @@ export default function ProductsPage({
     priceRange: []
   });
   const { searchQuery } = useSearchStore();
+  const { isAuthenticated } = useAuthStore();
+  const { syncMembership } = useWishlistStore();
 
   useEffect(() => {
     setMounted(true);
@@ -172,6 +175,17 @@ export default function ProductsPage({
       .finally(() => setLoading(false));
   }, [currentPage, filters, searchQuery]);
 
+  // Mark wishlisted products with one membership lookup for the whole page
+  useEffect(() => {
+    if (!isAuthenticated || products.length === 0) return;
+    apiService.getWishlistMembership(products.map(product => parseInt(product.id)))
+      .then(response => {
+        if (response.data) {
+          syncMembership(products, response.data.product_ids.map(String));
+        }
+      });
+  }, [products, isAuthenticated, syncMembership]);
+
   const totalPages = Math.ceil(totalProducts / pageSize);
 
   // PAGINATION BUTTON GENERATION (show max 5 buttons for example)
@@ -36,7 +36,8 @@ export const apiService = {
       name: product.name,
       images: product.images.map((img: any) => ({
         src: img.src,
-        alt: img.alt
+        alt: img.alt,
+        srcset: img.srcset
       })),
       originalPrice: product.original_price,
       salePrice: product.sale_price,
@@ -70,7 +71,8 @@ export const apiService = {
       name: product.name,
       images: product.images.map((img: any) => ({
         src: img.src,
-        alt: img.alt
+        alt: img.alt,
+        srcset: img.srcset
       })),
       originalPrice: product.original_price,
       salePrice: product.sale_price,
@@ -118,7 +120,8 @@ export const apiService = {
       name: product.name,
       images: product.images.map((img: any) => ({
         src: img.src,
-        alt: img.alt
+        alt: img.alt,
+        srcset: img.srcset
       })),
       originalPrice: product.original_price,
       salePrice: product.sale_price,
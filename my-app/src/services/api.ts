@@ -1,4 +1,6 @@
 const API_BASE_URL = 'http://localhost:8000'
+// Matches max_length of schemas.WishlistBatch.product_ids
+const WISHLIST_BATCH_SIZE = 500
 
 interface ApiResponse<T> {
   data?: T
@@ -94,6 +96,33 @@ class ApiService {
     })
   }
 
+  async getWishlistMembership(productIds: number[]) {
+    return this.request<{ product_ids: number[] }>(`/wishlist/contains?ids=${productIds.join(',')}`)
+  }
+
+  async addManyToWishlist(productIds: number[]) {
+    return this.wishlistBatch('POST', productIds)
+  }
+
+  async removeManyFromWishlist(productIds: number[]) {
+    return this.wishlistBatch('DELETE', productIds)
+  }
+
+  // The batch endpoint takes at most WISHLIST_BATCH_SIZE ids per call, so larger lists go in chunks
+  private async wishlistBatch(method: 'POST' | 'DELETE', productIds: number[]): Promise<ApiResponse<unknown>> {
+    let response: ApiResponse<unknown> = {}
+    for (let start = 0; start < productIds.length; start += WISHLIST_BATCH_SIZE) {
+      response = await this.request('/wishlist/batch', {
+        method,
+        body: JSON.stringify({ product_ids: productIds.slice(start, start + WISHLIST_BATCH_SIZE) }),
+      })
+      if (response.error) {
+        return response
+      }
+    }
+    return response
+  }
+
   // Orders endpoints
   async getOrders() {
     return this.request('/orders')
@@ -61,6 +61,7 @@ interface WishlistState {
   removeItem: (productId: string) => void
   clearWishlist: () => void
   isInWishlist: (productId: string) => boolean
+  syncMembership: (products: Product[], wishlistedIds: string[]) => void
 }
 
 interface SearchState {
@@ -169,6 +170,18 @@ export const useWishlistStore = create<WishlistState>()(
         const { items } = get()
         return items.some(item => item.id === productId)
       },
+      // Align the listed products with the server's wishlist, leaving other items alone
+      syncMembership: (products, wishlistedIds) => {
+        const wishlisted = new Set(wishlistedIds)
+        const listed = new Set(products.map(product => product.id))
+        set((state) => {
+          const items = state.items.filter(item => !listed.has(item.id) || wishlisted.has(item.id))
+          const present = new Set(items.map(item => item.id))
+          return {
+            items: [...items, ...products.filter(product => wishlisted.has(product.id) && !present.has(product.id))]
+          }
+        })
+      },
     }),
     {
       name: 'wishlist-storage',